@@ -1,7 +1,7 @@
 import asyncio
 from abc import ABC, abstractmethod
-from typing import Dict, Any
-from mcp.message_protocol import MCPMessage, MessageType
+from typing import Dict, Any, Optional
+from mcp.message_protocol import MCPMessage, MessageType, DeadlineExceeded
 from mcp.message_bus import message_bus
 import logging
 
@@ -17,17 +17,33 @@ class BaseAgent(ABC):
         pass
     
     async def send_message(self, receiver: str, message_type: MessageType, 
-                          payload: Dict[str, Any], trace_id: str):
+                          payload: Dict[str, Any], trace_id: str, deadline: Optional[float] = None):
         """Send a message to another agent"""
         message = MCPMessage(
             sender=self.agent_name,
             receiver=receiver,
             type=message_type,
             trace_id=trace_id,
-            payload=payload
+            payload=payload,
+            deadline=deadline
         )
         await message_bus.publish(message)
     
+    def check_deadline(self, message: MCPMessage, stage: str):
+        """Raise DeadlineExceeded if the message's deadline has already passed"""
+        if message.is_expired():
+            self.log_error(f"Deadline exceeded before {stage} (trace {message.trace_id})")
+            raise DeadlineExceeded(f"Deadline exceeded before {stage}")
+    
+    def stage_timeout(self, message: MCPMessage, budget: Optional[float]) -> Optional[float]:
+        """Time allowed for this stage: the stage budget capped by the trace deadline"""
+        remaining = message.time_remaining()
+        if remaining is None:
+            return budget
+        if budget is None:
+            return max(remaining, 0.0)
+        return max(min(remaining, budget), 0.0)
+    
     def log_info(self, message: str):
         self.logger.info(f"[{self.agent_name}] {message}")
     
@@ -1,106 +1,217 @@
 import asyncio
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 from .base_agent import BaseAgent
 from mcp.message_protocol import MCPMessage, MessageType, generate_trace_id
+from utils.job_queue import IngestionJob, IngestionJobQueue
+from utils.session_store import SessionStore
 import os
+import time
 
 class CoordinatorAgent(BaseAgent):
-    def __init__(self):
+    def __init__(self, max_ingestion_workers: int = 2, ingestion_timeout: float = 600.0,
+                 query_timeout: float = 30.0, session_ttl: float = 1800.0, max_sessions: int = 1000,
+                 job_ttl: float = 3600.0, max_finished_jobs: int = 1000):
         super().__init__("CoordinatorAgent")
-        self.active_conversations = {}
+        self.pending_queries = {}
+        self.sessions = SessionStore(ttl_seconds=session_ttl, max_sessions=max_sessions)
+        self.query_timeout = query_timeout
+        self.inflight_traces = {}
+        self.ingestion_timeout = ingestion_timeout
+        self.ingestion_jobs = IngestionJobQueue(self._run_ingestion_job, max_workers=max_ingestion_workers,
+                                                job_ttl=job_ttl, max_finished_jobs=max_finished_jobs)
+        self.pending_ingestions = {}
     
     async def handle_message(self, message: MCPMessage):
         """Handle incoming messages"""
         if message.type == MessageType.LLM_RESPONSE:
             await self._process_llm_response(message)
+        elif message.type == MessageType.INGESTION_STATUS:
+            await self._process_ingestion_status(message)
         elif message.type == MessageType.ERROR:
             await self._handle_error(message)
     
-    async def process_user_query(self, query: str, conversation_id: str = None) -> Dict[str, Any]:
+    async def process_user_query(self, query: str, conversation_id: str = None,
+                                 timeout: Optional[float] = None) -> Dict[str, Any]:
         """Process user query and coordinate between agents"""
         trace_id = generate_trace_id()
+        deadline = time.time() + (timeout or self.query_timeout)
         
+        session = None
         if conversation_id:
-            if conversation_id not in self.active_conversations:
-                self.active_conversations[conversation_id] = []
-            self.active_conversations[conversation_id].append({
-                'query': query,
-                'trace_id': trace_id
-            })
+            session = self.sessions.get_or_create(conversation_id)
+            session.add_turn(query, trace_id, self.sessions.max_turns)
         
         self.log_info(f"Processing user query: {query}")
         
         # Create a future to wait for the response
-        response_future = asyncio.Future()
-        self.active_conversations[trace_id] = response_future
+        response_future = asyncio.get_running_loop().create_future()
+        self.pending_queries[trace_id] = response_future
         
-        # Send retrieval request
-        await self.send_message(
+        # Send retrieval request from its own task, so the whole pipeline
+        # for this trace can be cancelled if the deadline passes
+        self.inflight_traces[trace_id] = asyncio.create_task(self.send_message(
             receiver="RetrievalAgent",
             message_type=MessageType.RETRIEVAL_REQUEST,
             payload={
                 'query': query,
-                'top_k': 5
+                'top_k': 5,
+                # Lets a follow-up re-score the previous turn's candidates
+                'retrieval_anchor': session.retrieval_anchor if session else None
             },
-            trace_id=trace_id
-        )
+            trace_id=trace_id,
+            deadline=deadline
+        ))
         
         # Wait for response
         try:
-            response = await asyncio.wait_for(response_future, timeout=30.0)
+            response = dict(await asyncio.wait_for(response_future, timeout=max(deadline - time.time(), 0.0)))
+            retrieval = response.pop('retrieval', None)
+            if session is not None and retrieval:
+                session.retrieval_anchor = retrieval['anchor']
             return response
         except asyncio.TimeoutError:
             self.log_error(f"Timeout waiting for response to query: {query}")
+            self.cancel_trace(trace_id)
             return {
                 'query': query,
                 'response': "I apologize, but the request timed out. Please try again.",
                 'sources': [],
                 'error': 'timeout'
             }
+        except asyncio.CancelledError:
+            self.cancel_trace(trace_id)
+            raise
+        finally:
+            self.pending_queries.pop(trace_id, None)
+            self.inflight_traces.pop(trace_id, None)
+    
+    async def shutdown(self):
+        """Cancel in-flight queries and stop the ingestion workers"""
+        for trace_id in list(self.inflight_traces):
+            self.cancel_trace(trace_id)
+        await self.ingestion_jobs.shutdown()
+    
+    def cancel_trace(self, trace_id: str) -> bool:
+        """Cancel in-flight retrieval and LLM work for a trace"""
+        task = self.inflight_traces.pop(trace_id, None)
+        if task is None or task.done():
+            return False
+        task.cancel()
+        self.log_info(f"Cancelled in-flight work for trace {trace_id}")
+        return True
+    
+    async def process_document_upload(self, file_path: str, file_type: str,
+                                      delete_after: bool = False) -> Dict[str, Any]:
+        """Queue a document for background ingestion.
+
+        With `delete_after`, the file is deleted once the job completes, or
+        when the record of a failed job expires.
+        """
+        job = await self.ingestion_jobs.submit(file_path, file_type, delete_file=delete_after)
+        
+        self.log_info(f"Queued document upload {job.job_id}: {file_path}")
+        
+        return {
+            'status': job.status.value,
+            'job_id': job.job_id,
+            'file_path': file_path,
+            'file_type': file_type,
+            'trace_id': job.trace_id
+        }
+    
+    def get_ingestion_status(self, job_id: str = None) -> Dict[str, Any]:
+        """Get the status of one ingestion job, or of all jobs"""
+        if job_id:
+            job = self.ingestion_jobs.get_job(job_id)
+            return job.to_dict() if job else {'job_id': job_id, 'error': 'unknown job'}
+        return {
+            'jobs': self.ingestion_jobs.list_jobs(),
+            'stats': self.ingestion_jobs.get_stats()
+        }
     
-    async def process_document_upload(self, file_path: str, file_type: str) -> Dict[str, Any]:
-        """Process document upload"""
+    async def retry_ingestion(self, job_id: str) -> Dict[str, Any]:
+        """Re-queue a failed ingestion job"""
+        job = await self.ingestion_jobs.retry(job_id)
+        self.log_info(f"Retrying document upload {job.job_id} (attempt {job.attempts + 1})")
+        return job.to_dict()
+    
+    async def _run_ingestion_job(self, job: IngestionJob):
+        """Run one ingestion job through the agent pipeline and wait for indexing"""
         trace_id = generate_trace_id()
+        job.trace_id = trace_id
+        
+        self.log_info(f"Processing document upload: {job.file_path}")
         
-        self.log_info(f"Processing document upload: {file_path}")
+        future = asyncio.get_running_loop().create_future()
+        self.pending_ingestions[trace_id] = {'job': job, 'future': future}
         
-        # Send ingestion request
-        await self.send_message(
+        # Send the ingestion request from its own task: publish runs the whole
+        # parse/embed/index chain inline, so awaiting it here would keep the
+        # timeout from ever starting
+        send_task = asyncio.create_task(self.send_message(
             receiver="IngestionAgent",
             message_type=MessageType.INGESTION_REQUEST,
             payload={
-                'file_path': file_path,
-                'file_type': file_type
+                'file_path': job.file_path,
+                'file_type': job.file_type
             },
             trace_id=trace_id
-        )
+        ))
         
-        return {
-            'status': 'processing',
-            'file_path': file_path,
-            'file_type': file_type,
-            'trace_id': trace_id
-        }
+        try:
+            result = await asyncio.wait_for(future, timeout=self.ingestion_timeout)
+        except asyncio.TimeoutError:
+            send_task.cancel()
+            raise TimeoutError(f"Ingestion timed out after {self.ingestion_timeout}s")
+        except asyncio.CancelledError:
+            send_task.cancel()
+            raise
+        finally:
+            self.pending_ingestions.pop(trace_id, None)
+        
+        if 'error' in result:
+            raise RuntimeError(result['error'])
+    
+    async def _process_ingestion_status(self, message: MCPMessage):
+        """Record ingestion progress reported by the agents"""
+        pending = self.pending_ingestions.get(message.trace_id)
+        if pending is None:
+            return
+        
+        job = pending['job']
+        payload = message.payload
+        for key in ('pages_parsed', 'chunks_total', 'chunks_embedded', 'chunks_deduplicated', 'cache_hit'):
+            if key in payload:
+                setattr(job, key, payload[key])
+        
+        if payload.get('stage') == 'indexed' and not pending['future'].done():
+            pending['future'].set_result(payload)
     
     async def _process_llm_response(self, message: MCPMessage):
         """Process LLM response"""
         trace_id = message.trace_id
         
-        if trace_id in self.active_conversations:
-            future = self.active_conversations[trace_id]
+        if trace_id in self.pending_queries:
+            future = self.pending_queries[trace_id]
             if not future.done():
                 future.set_result(message.payload)
-            del self.active_conversations[trace_id]
+            del self.pending_queries[trace_id]
     
     async def _handle_error(self, message: MCPMessage):
         """Handle error messages"""
         trace_id = message.trace_id
         
-        if trace_id in self.active_conversations:
-            future = self.active_conversations[trace_id]
+        if trace_id in self.pending_ingestions:
+            future = self.pending_ingestions[trace_id]['future']
+            if not future.done():
+                future.set_result({'error': message.payload.get('error', 'Unknown error')})
+            return
+        
+        if trace_id in self.pending_queries:
+            future = self.pending_queries[trace_id]
             if not future.done():
                 future.set_result({
                     'error': message.payload.get('error', 'Unknown error'),
                     'response': 'An error occurred while processing your request.'
                 })
-            del self.active_conversations[trace_id]
\ No newline at end of file
+            del self.pending_queries[trace_id]
\ No newline at end of file
@@ -3,13 +3,24 @@ from typing import Dict, Any, List
 from .base_agent import BaseAgent
 from mcp.message_protocol import MCPMessage, MessageType
 from utils.document_parsers import DocumentParser
+from utils.document_cache import DocumentCache
+from utils.chunk_dedupe import strip_boilerplate
 import os
 
 class IngestionAgent(BaseAgent):
-    def __init__(self):
+    # Part of the parse cache key: bump whenever the parsers or
+    # _extract_text_chunks change the chunks produced for a file
+    CHUNKING_VERSION = 3
+    
+    # Formats chunked by page or slide, where headers and footers repeat;
+    # the others are chunked by paragraph, one line per chunk
+    PAGED_TYPES = {'pdf', 'pptx'}
+    
+    def __init__(self, cache_dir: str = None, cache_memory_bytes: int = 64 * 1024 * 1024,
+                 cache_disk_bytes: int = 512 * 1024 * 1024):
         super().__init__("IngestionAgent")
         self.parser = DocumentParser()
-        self.processed_documents = {}
+        self.document_cache = DocumentCache(cache_dir, cache_memory_bytes, cache_disk_bytes)
     
     async def handle_message(self, message: MCPMessage):
         """Handle incoming messages"""
@@ -24,18 +35,25 @@ class IngestionAgent(BaseAgent):
             
             self.log_info(f"Processing {file_type} file: {file_path}")
             
-            # Parse the document
-            parsed_doc = self.parser.parse_document(file_path, file_type)
+            # Parse the document (or replay it from the cache) off the event loop
+            document = await asyncio.to_thread(self._load_document, file_path, file_type)
+            text_chunks = document['text_chunks']
+            metadata = dict(document['metadata'], file_path=file_path)
             
-            # Extract text chunks for embedding
-            text_chunks = self._extract_text_chunks(parsed_doc)
+            # Report parsing progress to the coordinator
+            await self.send_message(
+                receiver="CoordinatorAgent",
+                message_type=MessageType.INGESTION_STATUS,
+                payload={
+                    'stage': 'parsed',
+                    'pages_parsed': document['items_parsed'],
+                    'chunks_total': len(text_chunks),
+                    'cache_hit': document['cache_hit']
+                },
+                trace_id=message.trace_id
+            )
             
-            # Store processed document
             doc_id = f"{file_path}_{file_type}"
-            self.processed_documents[doc_id] = {
-                'parsed_doc': parsed_doc,
-                'text_chunks': text_chunks
-            }
             
             # Send response to RetrievalAgent
             await self.send_message(
@@ -44,7 +62,7 @@ class IngestionAgent(BaseAgent):
                 payload={
                     'document_id': doc_id,
                     'text_chunks': text_chunks,
-                    'metadata': parsed_doc.get('metadata', {}),
+                    'metadata': metadata,
                     'document_type': file_type
                 },
                 trace_id=message.trace_id
@@ -61,19 +79,56 @@ class IngestionAgent(BaseAgent):
                 trace_id=message.trace_id
             )
     
+    def _load_document(self, file_path: str, file_type: str) -> Dict[str, Any]:
+        """Get a document's text chunks, skipping the parse on a cache hit"""
+        cache_key = DocumentCache.hash_file(file_path, file_type, self.CHUNKING_VERSION)
+        cached = self.document_cache.get(cache_key)
+        if cached is not None:
+            self.log_info(f"Cache hit for {file_path} ({self._format_cache_stats()})")
+            return dict(cached, cache_hit=True)
+        
+        parsed_doc = self.parser.parse_document(file_path, file_type)
+        document = {
+            'text_chunks': self._extract_text_chunks(parsed_doc),
+            'metadata': parsed_doc.get('metadata', {}),
+            'items_parsed': len(parsed_doc.get('content', []))
+        }
+        self.document_cache.put(cache_key, document)
+        self.log_info(f"Cached parsed document {file_path} ({self._format_cache_stats()})")
+        return dict(document, cache_hit=False)
+    
+    def get_cache_stats(self) -> Dict[str, Any]:
+        return self.document_cache.get_stats()
+    
+    def _format_cache_stats(self) -> str:
+        stats = self.document_cache.get_stats()
+        return (f"hit rate {stats['hit_rate']:.0%}, "
+                f"{stats['memory_bytes'] + stats['disk_bytes']} bytes in "
+                f"{stats['memory_entries'] + stats['disk_entries']} entries")
+    
     def _extract_text_chunks(self, parsed_doc: Dict[str, Any]) -> List[Dict[str, Any]]:
-        """Extract text chunks from parsed document"""
-        chunks = []
-        content = parsed_doc.get('content', [])
+        """Extract text chunks from parsed document, minus repeated headers and footers"""
+        items = [item for item in parsed_doc.get('content', [])
+                 if isinstance(item, dict) and 'content' in item]
+        
+        texts = [item['content'] for item in items]
+        lines_removed = 0
+        if parsed_doc['type'] in self.PAGED_TYPES:
+            texts, lines_removed = strip_boilerplate(texts)
+        if lines_removed:
+            self.log_info(f"Stripped {lines_removed} boilerplate lines from {len(items)} chunks")
         
-        for item in content:
-            if isinstance(item, dict) and 'content' in item:
-                chunks.append({
-                    'text': item['content'],
-                    'metadata': {
-                        'document_type': parsed_doc['type'],
-                        'section': item.get('page', item.get('slide', item.get('paragraph', 1)))
-                    }
-                })
+        chunks = []
+        for item, text in zip(items, texts):
+            # Pages that held nothing but boilerplate are dropped
+            if not text:
+                continue
+            chunks.append({
+                'text': text,
+                'metadata': {
+                    'document_type': parsed_doc['type'],
+                    'section': item.get('page', item.get('slide', item.get('paragraph', 1)))
+                }
+            })
         
         return chunks
\ No newline at end of file
@@ -1,17 +1,24 @@
 import asyncio
-from typing import Dict, Any, List
+import time
+from typing import Dict, Any, List, Optional
 from .base_agent import BaseAgent
 from mcp.message_protocol import MCPMessage, MessageType
+from utils.embeddings import get_openai_api_key
+from utils.rate_limiter import AdaptiveRateLimiter, Priority, openai_limiter
 import openai
 import os
-import streamlit as st
 
 class LLMResponseAgent(BaseAgent):
-    def __init__(self):
+    def __init__(self, time_budget: Optional[float] = 25.0, max_tokens: int = 1000,
+                 rate_limiter: Optional[AdaptiveRateLimiter] = None):
         super().__init__("LLMResponseAgent")
-        # Initialize OpenAI client (you can replace with any LLM)
-        api_key = st.secrets.get("OPENAI_API_KEY") or os.getenv("OPENAI_API_KEY")
-        self.client = openai.OpenAI(api_key=api_key)
+        # Initialize OpenAI client (you can replace with any LLM); retries are
+        # left to the shared limiter (see AdaptiveRateLimiter.run)
+        api_key = get_openai_api_key()
+        self.client = openai.AsyncOpenAI(api_key=api_key, max_retries=0)
+        self.rate_limiter = rate_limiter or openai_limiter
+        self.time_budget = time_budget
+        self.max_tokens = max_tokens
     
     async def handle_message(self, message: MCPMessage):
         """Handle incoming messages"""
@@ -25,6 +32,7 @@ class LLMResponseAgent(BaseAgent):
             retrieved_chunks = message.payload.get('retrieved_chunks', [])
             
             self.log_info(f"Generating response for query: {query}")
+            self.check_deadline(message, "LLM generation")
             
             # Build context from retrieved chunks
             context = self._build_context(retrieved_chunks)
@@ -32,8 +40,11 @@ class LLMResponseAgent(BaseAgent):
             # Generate prompt
             prompt = self._build_prompt(query, context)
             
-            # Call LLM
-            response = self._call_llm(prompt)
+            # Call LLM within this stage's budget
+            response = await self._call_llm(prompt, timeout=self.stage_timeout(message, self.time_budget))
+            
+            # Don't deliver an answer the coordinator has stopped waiting for
+            self.check_deadline(message, "delivering LLM response")
             
             # Send response back to coordinator
             await self.send_message(
@@ -43,9 +54,11 @@ class LLMResponseAgent(BaseAgent):
                     'query': query,
                     'response': response,
                     'context_used': retrieved_chunks,
-                    'sources': self._extract_sources(retrieved_chunks)
+                    'sources': self._extract_sources(retrieved_chunks),
+                    'retrieval': message.payload.get('retrieval')
                 },
-                trace_id=message.trace_id
+                trace_id=message.trace_id,
+                deadline=message.deadline
             )
             
             self.log_info("Successfully generated LLM response")
@@ -87,18 +100,27 @@ Please provide a comprehensive answer based on the context above. Include refere
         
         return prompt
     
-    def _call_llm(self, prompt: str) -> str:
+    async def _call_llm(self, prompt: str, timeout: Optional[float] = None) -> str:
         """Call LLM to generate response"""
-        try:
-            response = self.client.chat.completions.create(
+        deadline = time.time() + timeout if timeout is not None else None
+        
+        def call():
+            kwargs = {'timeout': max(deadline - time.time(), 0.001)} if deadline is not None else {}
+            return self.client.chat.completions.create(
                 model="gpt-3.5-turbo",
                 messages=[
                     {"role": "system", "content": "You are a helpful assistant that answers questions based on provided context."},
                     {"role": "user", "content": prompt}
                 ],
-                max_tokens=1000,
-                temperature=0.7
+                max_tokens=self.max_tokens,
+                temperature=0.7,
+                **kwargs
             )
+        
+        try:
+            # Prompt tokens (~4 characters each) plus the completion allowance
+            tokens = len(prompt) / 4 + self.max_tokens
+            response = await self.rate_limiter.run(call, priority=Priority.INTERACTIVE, tokens=tokens)
             return response.choices[0].message.content
         except Exception as e:
             self.log_error(f"Error calling LLM: {e}")
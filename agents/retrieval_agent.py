@@ -1,17 +1,41 @@
 import asyncio
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Tuple
 from .base_agent import BaseAgent
-from mcp.message_protocol import MCPMessage, MessageType
+from mcp.message_protocol import MCPMessage, MessageType, DeadlineExceeded
 from utils.vector_store import VectorStore
 from utils.embeddings import EmbeddingGenerator
+from utils.micro_batcher import MicroBatcher
+from utils.rate_limiter import Priority
+from utils.chunk_dedupe import ChunkDeduplicator, UNIQUE, LOCAL
+import numpy as np
 import os
+import time
 
 class RetrievalAgent(BaseAgent):
-    def __init__(self):
+    def __init__(self, embedding_batch_size: int = 64, batch_window_ms: float = 5.0,
+                 max_batch_size: int = 32, time_budget: Optional[float] = 10.0,
+                 candidate_pool: int = 20, followup_slack: float = 0.0,
+                 search_dimension: Optional[int] = None, rerank_factor: int = 4,
+                 dedupe_threshold: float = 0.85):
         super().__init__("RetrievalAgent")
         self.embedding_generator = EmbeddingGenerator()
-        self.vector_store = VectorStore(self.embedding_generator.get_embedding_dimension())
+        self.embedding_batch_size = embedding_batch_size
+        self.time_budget = time_budget
+        self.candidate_pool = candidate_pool
+        self.followup_slack = followup_slack
+        self.followup_stats = {'reused': 0, 'fallback': 0}
+        self.query_batcher = MicroBatcher(
+            self._retrieve_batch, window_ms=batch_window_ms, max_batch_size=max_batch_size
+        )
+        self.vector_store = VectorStore(
+            self.embedding_generator.get_embedding_dimension(),
+            search_dimension=search_dimension,
+            rerank_factor=rerank_factor
+        )
         self.documents_indexed = set()
+        # Exact repeats, within and across documents, are embedded once and
+        # stored as pointers to the first copy; near duplicates are counted
+        self.deduplicator = ChunkDeduplicator(threshold=dedupe_threshold)
     
     async def handle_message(self, message: MCPMessage):
         """Handle incoming messages"""
@@ -29,6 +53,7 @@ class RetrievalAgent(BaseAgent):
             
             if document_id in self.documents_indexed:
                 self.log_info(f"Document {document_id} already indexed")
+                await self._send_ingestion_status(message.trace_id, 'indexed', chunks_embedded=0)
                 return
             
             self.log_info(f"Indexing document: {document_id}")
@@ -38,51 +63,114 @@ class RetrievalAgent(BaseAgent):
             
             if not texts:
                 self.log_info(f"No text content found in document: {document_id}")
+                await self._send_ingestion_status(message.trace_id, 'indexed', chunks_embedded=0)
                 return
             
-            # Generate embeddings
-            embeddings = self.embedding_generator.generate_embeddings(texts)
-            
-            # Prepare metadata for each chunk
-            chunk_metadata = []
-            for i, chunk in enumerate(text_chunks):
-                chunk_meta = {
-                    'document_id': document_id,
-                    'chunk_id': i,
-                    'document_metadata': metadata,
-                    'chunk_metadata': chunk.get('metadata', {})
-                }
-                chunk_metadata.append(chunk_meta)
+            # Only chunks not seen before (in this or an earlier document) are embedded
+            signatures = await asyncio.to_thread(self.deduplicator.signatures, texts)
+            assignments = self.deduplicator.assign(document_id, signatures)
+            unique = [i for i, (kind, _) in enumerate(assignments) if kind == UNIQUE]
+            duplicates = len(texts) - len(unique)
+            
+            # Generate embeddings in batches off the event loop, reporting progress.
+            # Ingestion is bulk work: queries are served first under the shared limiter
+            batches = []
+            for start in range(0, len(unique), self.embedding_batch_size):
+                batch = [texts[i] for i in unique[start:start + self.embedding_batch_size]]
+                batches.append(await self.embedding_generator.agenerate_embeddings(batch, priority=Priority.BULK))
+                await self._send_ingestion_status(
+                    message.trace_id, 'embedding', chunks_embedded=duplicates + start + len(batch)
+                )
+            
+            # Add to vector store; document metadata is stored once per document
+            chunk_metadata = [chunk.get('metadata', {}) for chunk in text_chunks]
+            sections = [meta.get('section') for meta in chunk_metadata]
+            document_type = chunk_metadata[0].get('document_type')
+            positions = {}
+            if unique:
+                first = self.vector_store.add_documents(
+                    np.vstack(batches),
+                    document_id,
+                    [texts[i] for i in unique],
+                    sections=[sections[i] for i in unique],
+                    document_metadata=metadata,
+                    document_type=document_type,
+                    chunk_ids=unique
+                )
+                positions = {i: first + rank for rank, i in enumerate(unique)}
+                self.deduplicator.resolve(document_id, positions)
             
-            # Add to vector store
-            self.vector_store.add_documents(embeddings, texts, chunk_metadata)
+            repeated = [i for i, (kind, _) in enumerate(assignments) if kind != UNIQUE]
+            if repeated:
+                self.vector_store.add_duplicates(
+                    document_id,
+                    [positions[ref] if kind == LOCAL else ref for kind, ref in (assignments[i] for i in repeated)],
+                    chunk_ids=repeated,
+                    sections=[sections[i] for i in repeated],
+                    document_metadata=metadata,
+                    document_type=document_type
+                )
             self.documents_indexed.add(document_id)
             
-            self.log_info(f"Successfully indexed {len(texts)} chunks for document: {document_id}")
+            self.log_info(f"Successfully indexed {len(texts)} chunks for document: {document_id} "
+                          f"({len(unique)} embedded, {duplicates} duplicates)")
+            await self._send_ingestion_status(
+                message.trace_id, 'indexed', chunks_embedded=len(texts), chunks_deduplicated=duplicates
+            )
             
         except Exception as e:
             self.log_error(f"Error indexing document: {e}")
+            await self.send_message(
+                receiver="CoordinatorAgent",
+                message_type=MessageType.ERROR,
+                payload={'error': str(e)},
+                trace_id=message.trace_id
+            )
+    
+    async def _send_ingestion_status(self, trace_id: str, stage: str, chunks_embedded: int,
+                                     chunks_deduplicated: int = 0):
+        """Report indexing progress to the coordinator"""
+        await self.send_message(
+            receiver="CoordinatorAgent",
+            message_type=MessageType.INGESTION_STATUS,
+            payload={
+                'stage': stage,
+                'chunks_embedded': chunks_embedded,
+                'chunks_deduplicated': chunks_deduplicated
+            },
+            trace_id=trace_id
+        )
     
     async def _process_retrieval_request(self, message: MCPMessage):
         """Process retrieval request"""
         try:
             query = message.payload.get('query')
             top_k = message.payload.get('top_k', 5)
+            anchor = message.payload.get('retrieval_anchor')
             
             self.log_info(f"Processing retrieval request: {query}")
+            self.check_deadline(message, "retrieval")
             
-            # Generate query embedding
-            query_embedding = self.embedding_generator.generate_embeddings([query])[0]
-            
-            # Search in vector store
-            search_results = self.vector_store.search(query_embedding, k=top_k)
+            # Embed and search together with other concurrent requests,
+            # within this stage's budget
+            timeout = self.stage_timeout(message, self.time_budget)
+            stage_deadline = time.time() + timeout if timeout is not None else None
+            try:
+                outcome = await asyncio.wait_for(
+                    self._submit_query(query, top_k, stage_deadline, anchor), timeout=timeout
+                )
+            except asyncio.TimeoutError:
+                raise DeadlineExceeded("Retrieval exceeded its time budget")
+            if outcome is None:
+                raise DeadlineExceeded("Deadline exceeded before retrieval batch ran")
             
             # Format results
             retrieved_chunks = []
-            for result in search_results:
+            for result in outcome['results']:
+                chunk = result['chunk']
                 retrieved_chunks.append({
-                    'text': result['document'],
-                    'metadata': result['metadata'],
+                    'text': chunk.text,
+                    'metadata': chunk.metadata,
                     'score': result['score']
                 })
             
@@ -93,9 +181,14 @@ class RetrievalAgent(BaseAgent):
                 payload={
                     'query': query,
                     'retrieved_chunks': retrieved_chunks,
-                    'total_results': len(retrieved_chunks)
+                    'total_results': len(retrieved_chunks),
+                    'retrieval': {
+                        'anchor': outcome['anchor'],
+                        'reused_candidates': outcome['reused_candidates']
+                    }
                 },
-                trace_id=message.trace_id
+                trace_id=message.trace_id,
+                deadline=message.deadline
             )
             
             self.log_info(f"Retrieved {len(retrieved_chunks)} chunks for query")
@@ -107,4 +200,114 @@ class RetrievalAgent(BaseAgent):
                 message_type=MessageType.ERROR,
                 payload={'error': str(e)},
                 trace_id=message.trace_id
-            )
\ No newline at end of file
+            )
+    
+    async def _submit_query(self, query: str, top_k: int, stage_deadline: Optional[float],
+                            anchor: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """Submit a query to the micro-batcher; None once its own deadline has passed.
+        
+        A request coalesced onto an in-flight duplicate shares that request's
+        item, including its deadline. If the shared item had expired it comes
+        back None, so a request that is still live resubmits with its own.
+        """
+        # Requests only share a result when they carry the same anchor (the
+        # session's own dict, alive while the request is), so a session never
+        # receives candidates re-scored against another session's anchor
+        key = (query, top_k, id(anchor) if anchor is not None else None)
+        while True:
+            outcome = await self.query_batcher.submit(key, (query, top_k, stage_deadline, anchor))
+            if outcome is not None or (stage_deadline is not None and time.time() >= stage_deadline):
+                return outcome
+    
+    async def _retrieve_batch(self, requests: List[Tuple[str, int, Optional[float], Optional[Dict[str, Any]]]]) -> List[Optional[Dict[str, Any]]]:
+        """Embed a batch of queries in one call and search them together.
+        
+        Follow-up requests that carry a retrieval anchor are first re-scored
+        against the anchor's candidate set; only those the candidate set
+        cannot answer go to the full index search. Requests whose deadline
+        has already passed are skipped and get None.
+        """
+        now = time.time()
+        live = [request for request in requests if request[2] is None or request[2] > now]
+        if not live:
+            return [None] * len(requests)
+        
+        queries = list(dict.fromkeys(query for query, _, _, _ in live))
+        deadlines = [deadline for _, _, deadline, _ in live]
+        timeout = None if None in deadlines else max(deadlines) - now
+        
+        self.log_info(f"Retrieving batch of {len(live)} requests ({len(queries)} unique queries)")
+        
+        query_embeddings = dict(zip(queries, await self.embedding_generator.agenerate_embeddings(
+            queries, priority=Priority.INTERACTIVE, timeout=timeout
+        )))
+        
+        # Try each request's own cached candidate set first
+        outcomes: List[Optional[Dict[str, Any]]] = [None] * len(requests)
+        pending = []
+        for i, (query, top_k, deadline, anchor) in enumerate(requests):
+            if deadline is not None and deadline <= now:
+                continue
+            results = self._rescore_candidates(query_embeddings[query], top_k, anchor)
+            if results is not None:
+                outcomes[i] = {'results': results, 'anchor': anchor, 'reused_candidates': True}
+            else:
+                pending.append(i)
+        
+        # Search the full index for everything else
+        full_queries = list(dict.fromkeys(requests[i][0] for i in pending))
+        if full_queries:
+            k = max([self.candidate_pool] + [requests[i][1] for i in pending])
+            search_results = self.vector_store.search_batch(
+                np.stack([query_embeddings[query] for query in full_queries]), k=k
+            )
+            full_results = dict(zip(full_queries, search_results))
+            anchors = {query: self._build_anchor(query_embeddings[query], full_results[query])
+                       for query in full_queries}
+            for i in pending:
+                query, top_k = requests[i][:2]
+                outcomes[i] = {
+                    'results': full_results[query][:top_k],
+                    'anchor': anchors[query],
+                    'reused_candidates': False
+                }
+        
+        return outcomes
+    
+    def _build_anchor(self, query_embedding: np.ndarray, results: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """Describe a full search's result set so a follow-up can re-score it"""
+        if not results:
+            return None
+        index_size = len(self.vector_store.chunks)
+        return {
+            'candidate_ids': [result['chunk'].index for result in results],
+            'query_embedding': query_embedding,
+            # Every chunk outside the set is at least this far from the anchor query
+            'radius': float('inf') if len(results) >= index_size else float(np.sqrt(results[-1]['score'])),
+            'index_size': index_size
+        }
+    
+    def _rescore_candidates(self, query_embedding: np.ndarray, top_k: int,
+                            anchor: Optional[Dict[str, Any]]) -> Optional[List[Dict[str, Any]]]:
+        """Rank a follow-up query against the previous turn's candidate set.
+        
+        By the triangle inequality, every chunk outside the candidate set is
+        at least radius - |q - q_anchor| from the new query q. If the k-th
+        best candidate is closer than that, the candidates hold the exact
+        top-k and the full index search can be skipped.
+        """
+        if anchor is None:
+            return None
+        if anchor['index_size'] != len(self.vector_store.chunks) or top_k > len(anchor['candidate_ids']):
+            self.followup_stats['fallback'] += 1
+            return None
+        
+        results = self.vector_store.rescore(query_embedding, anchor['candidate_ids'], k=top_k)
+        shift = float(np.linalg.norm(query_embedding - anchor['query_embedding']))
+        kth_distance = float(np.sqrt(results[-1]['score']))
+        if kth_distance <= anchor['radius'] - shift + self.followup_slack:
+            self.followup_stats['reused'] += 1
+            return results
+        
+        self.followup_stats['fallback'] += 1
+        return None
\ No newline at end of file
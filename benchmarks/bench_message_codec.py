@@ -0,0 +1,69 @@
+"""Round-trip benchmark: MCPMessage binary codec vs. the to_dict/JSON form.
+
+Run from the repository root:
+    python benchmarks/bench_message_codec.py
+"""
+import json
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from mcp.message_protocol import MCPMessage, MessageType
+from mcp.codec import pack_message, unpack_message
+
+def build_message(num_chunks: int, chunk_chars: int, dimension: int) -> MCPMessage:
+    rng = np.random.default_rng(0)
+    chunks = [{
+        'text': ('lorem ipsum dolor sit amet ' * (chunk_chars // 27 + 1))[:chunk_chars],
+        'metadata': {'document_id': 'report.pdf_pdf', 'chunk_id': i,
+                     'chunk_metadata': {'document_type': 'pdf', 'section': i // 4 + 1}},
+        'score': float(i)
+    } for i in range(num_chunks)]
+    return MCPMessage(
+        sender="RetrievalAgent",
+        receiver="LLMResponseAgent",
+        type=MessageType.RETRIEVAL_RESPONSE,
+        trace_id="bench123",
+        payload={
+            'query': 'What are the KPIs?',
+            'retrieved_chunks': chunks,
+            'embeddings': rng.standard_normal((num_chunks, dimension)).astype('float32')
+        }
+    )
+
+def dict_round_trip(message: MCPMessage) -> int:
+    data = message.to_dict()
+    data['payload'] = dict(data['payload'], embeddings=data['payload']['embeddings'].tolist())
+    encoded = json.dumps(data).encode('utf-8')
+    decoded = MCPMessage.from_dict(json.loads(encoded))
+    decoded.payload['embeddings'] = np.asarray(decoded.payload['embeddings'], dtype='float32')
+    return len(encoded)
+
+def binary_round_trip(message: MCPMessage) -> int:
+    encoded = pack_message(message)
+    unpack_message(encoded)
+    return len(encoded)
+
+def timeit(fn, message: MCPMessage, repeat: int):
+    size = fn(message)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn(message)
+    return (time.perf_counter() - start) / repeat, size
+
+def main():
+    print(f"{'case':<28}{'dict+json ms':>14}{'binary ms':>12}{'speedup':>10}{'dict KB':>10}{'binary KB':>11}")
+    for num_chunks, chunk_chars, dimension in [(5, 1000, 3072), (50, 1000, 3072), (500, 8000, 3072)]:
+        message = build_message(num_chunks, chunk_chars, dimension)
+        repeat = max(3, 2000 // num_chunks)
+        dict_time, dict_size = timeit(dict_round_trip, message, repeat)
+        binary_time, binary_size = timeit(binary_round_trip, message, repeat)
+        case = f"{num_chunks}x{chunk_chars}ch, d={dimension}"
+        print(f"{case:<28}{dict_time * 1e3:>14.2f}{binary_time * 1e3:>12.2f}"
+              f"{dict_time / binary_time:>9.1f}x{dict_size / 1024:>10.0f}{binary_size / 1024:>11.0f}")
+
+if __name__ == "__main__":
+    main()
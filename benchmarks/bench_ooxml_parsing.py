@@ -0,0 +1,66 @@
+"""Throughput benchmark: streaming DOCX/PPTX extraction vs. python-docx/python-pptx.
+
+Builds synthetic documents, parses each with DocumentParser(fast_ooxml=True)
+and DocumentParser(fast_ooxml=False), checks both produce the same content
+and reports the timings. Run from the repository root:
+    python benchmarks/bench_ooxml_parsing.py
+"""
+import os
+import sys
+import tempfile
+import time
+from docx import Document
+from pptx import Presentation
+from pptx.util import Inches
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.document_parsers import DocumentParser
+
+def build_docx(path: str, num_paragraphs: int):
+    doc = Document()
+    for i in range(num_paragraphs):
+        paragraph = doc.add_paragraph(f"Paragraph {i}: quarterly revenue grew in region {i % 7}. ")
+        paragraph.add_run("Bold follow-up sentence.").bold = True
+        if i % 50 == 0:
+            doc.add_paragraph("")
+            table = doc.add_table(rows=2, cols=2)
+            table.cell(0, 0).text = "table text is not a body paragraph"
+    doc.save(path)
+
+def build_pptx(path: str, num_slides: int):
+    presentation = Presentation()
+    layout = presentation.slide_layouts[1]
+    for i in range(num_slides):
+        slide = presentation.slides.add_slide(layout)
+        slide.shapes.title.text = f"Slide {i} title"
+        slide.placeholders[1].text = f"First bullet {i}\nSecond bullet\vwith a line break"
+        box = slide.shapes.add_textbox(Inches(1), Inches(5), Inches(4), Inches(1))
+        box.text_frame.text = f"Footer {i}"
+    presentation.save(path)
+
+def time_parse(parser: DocumentParser, path: str, file_type: str, repeat: int):
+    result = parser.parse_document(path, file_type)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        parser.parse_document(path, file_type)
+    return (time.perf_counter() - start) / repeat, result
+
+def main():
+    fast, full = DocumentParser(fast_ooxml=True), DocumentParser(fast_ooxml=False)
+    cases = [('docx', 1000), ('docx', 20000), ('pptx', 50), ('pptx', 500)]
+    print(f"{'case':<18}{'library ms':>12}{'streaming ms':>14}{'speedup':>10}{'items':>8}")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for file_type, size in cases:
+            path = os.path.join(tmp_dir, f"bench_{size}.{file_type}")
+            (build_docx if file_type == 'docx' else build_pptx)(path, size)
+            repeat = 3
+            full_time, full_result = time_parse(full, path, file_type, repeat)
+            fast_time, fast_result = time_parse(fast, path, file_type, repeat)
+            if fast_result['content'] != full_result['content']:
+                raise AssertionError(f"Streaming output differs for {file_type} x{size}")
+            print(f"{file_type + ' x' + str(size):<18}{full_time * 1e3:>12.1f}{fast_time * 1e3:>14.1f}"
+                  f"{full_time / fast_time:>9.1f}x{len(fast_result['content']):>8}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""Search benchmark: full-width flat index vs. truncated index + full-vector re-rank.
+
+Reports per-query search time, index memory and recall@k against exact
+full-width search. By default it uses synthetic 3072-d vectors whose energy
+decays across dimensions, standing in for Matryoshka-style embeddings; pass
+a .npy file of real embeddings (one row per chunk) for representative recall:
+    python benchmarks/bench_two_stage_search.py [embeddings.npy]
+"""
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.vector_store import VectorStore
+
+def synthetic_embeddings(count: int, dimension: int, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    scale = 1.0 / np.sqrt(1.0 + np.arange(dimension) / 64.0)
+    vectors = rng.standard_normal((count, dimension)).astype('float32') * scale
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+def perturbed_queries(corpus: np.ndarray, count: int, seed: int = 1) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    picks = corpus[rng.integers(0, len(corpus), count)]
+    queries = picks + 0.8 * synthetic_embeddings(count, corpus.shape[1], seed + 1)
+    return queries / np.linalg.norm(queries, axis=1, keepdims=True)
+
+def build_store(corpus: np.ndarray, search_dimension=None, rerank_factor: int = 4) -> VectorStore:
+    store = VectorStore(corpus.shape[1], search_dimension=search_dimension, rerank_factor=rerank_factor)
+    store.add_documents(corpus, 'bench', ['x'] * len(corpus), [1] * len(corpus))
+    return store
+
+def run(store: VectorStore, queries: np.ndarray, k: int, batch_size: int = 8):
+    # Small batches, as produced by the retrieval micro-batcher
+    results = []
+    start = time.perf_counter()
+    for i in range(0, len(queries), batch_size):
+        results.extend(store.search_batch(queries[i:i + batch_size], k=k))
+    elapsed = (time.perf_counter() - start) / len(queries)
+    return elapsed, [[result['chunk'].index for result in row] for row in results]
+
+def main():
+    k = 10
+    if len(sys.argv) > 1:
+        corpus = np.load(sys.argv[1]).astype('float32')
+    else:
+        corpus = synthetic_embeddings(50000, 3072)
+    queries = perturbed_queries(corpus, 200)
+
+    baseline = build_store(corpus)
+    base_time, truth = run(baseline, queries, k)
+    base_bytes = baseline.get_stats()['index_bytes']
+    print(f"{'mode':<22}{'ms/query':>10}{'speedup':>9}{'index MB':>10}{'recall@' + str(k):>11}")
+    print(f"{'full ' + str(corpus.shape[1]):<22}{base_time * 1e3:>10.2f}{1.0:>8.1f}x{base_bytes / 2**20:>10.1f}{1.0:>11.3f}")
+
+    for search_dimension, rerank_factor in [(1024, 4), (512, 4), (256, 4), (256, 10)]:
+        store = build_store(corpus, search_dimension, rerank_factor)
+        elapsed, found = run(store, queries, k)
+        recall = np.mean([len(set(a) & set(b)) / k for a, b in zip(found, truth)])
+        label = f"{search_dimension} x{rerank_factor} re-rank"
+        print(f"{label:<22}{elapsed * 1e3:>10.2f}{base_time / elapsed:>8.1f}x"
+              f"{store.get_stats()['index_bytes'] / 2**20:>10.1f}{recall:>11.3f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,222 @@
+import struct
+from typing import Any, List, Tuple, Union
+import numpy as np
+from .message_protocol import MCPMessage, MessageType
+
+# Frame layout:
+#   MAGIC | u32 header length | header | u32 buffer count | (u64 offset, u64 length) * count | buffers
+# The header holds the message fields and payload in a small tagged encoding.
+# NumPy arrays and strings of at least OUT_OF_BAND_THRESHOLD bytes are not
+# inlined; they are referenced by index into the buffer table, and buffers
+# are 64-byte aligned in the frame so arrays can be decoded in place.
+MAGIC = b'MCP1'
+OUT_OF_BAND_THRESHOLD = 4096
+BUFFER_ALIGNMENT = 64
+
+_NONE, _TRUE, _FALSE = b'N', b'T', b'F'
+_INT, _BIGINT, _FLOAT = b'i', b'I', b'd'
+_STR, _BYTES, _OOB_STR, _OOB_BYTES = b's', b'b', b'S', b'B'
+_LIST, _DICT, _ARRAY = b'l', b'm', b'a'
+
+_U32 = struct.Struct('<I')
+_I64 = struct.Struct('<q')
+_F64 = struct.Struct('<d')
+_SPAN = struct.Struct('<QQ')
+
+BufferLike = Union[bytes, bytearray, memoryview]
+
+class _Encoder:
+    def __init__(self, threshold: int):
+        self.threshold = threshold
+        self.out = bytearray()
+        self.buffers: List[memoryview] = []
+
+    def _oob(self, buffer: BufferLike) -> int:
+        self.buffers.append(memoryview(buffer).cast('B'))
+        return len(self.buffers) - 1
+
+    def _raw(self, data: bytes):
+        self.out += _U32.pack(len(data))
+        self.out += data
+
+    def encode(self, value: Any):
+        out = self.out
+        if value is None:
+            out += _NONE
+        elif value is True:
+            out += _TRUE
+        elif value is False:
+            out += _FALSE
+        elif isinstance(value, int):
+            if -2**63 <= value < 2**63:
+                out += _INT + _I64.pack(value)
+            else:
+                out += _BIGINT
+                self._raw(str(value).encode('ascii'))
+        elif isinstance(value, float):
+            out += _FLOAT + _F64.pack(value)
+        elif isinstance(value, str):
+            data = value.encode('utf-8')
+            if len(data) >= self.threshold:
+                out += _OOB_STR + _U32.pack(self._oob(data))
+            else:
+                out += _STR
+                self._raw(data)
+        elif isinstance(value, (bytes, bytearray, memoryview)):
+            if len(value) >= self.threshold:
+                out += _OOB_BYTES + _U32.pack(self._oob(value))
+            else:
+                out += _BYTES
+                self._raw(bytes(value))
+        elif isinstance(value, np.ndarray):
+            self._encode_array(value)
+        elif isinstance(value, np.generic):
+            self.encode(value.item())
+        elif isinstance(value, (list, tuple)):
+            out += _LIST + _U32.pack(len(value))
+            for item in value:
+                self.encode(item)
+        elif isinstance(value, dict):
+            out += _DICT + _U32.pack(len(value))
+            for key, item in value.items():
+                self.encode(key)
+                self.encode(item)
+        elif isinstance(value, MessageType):
+            self.encode(value.value)
+        else:
+            raise TypeError(f"Cannot encode value of type {type(value).__name__}")
+
+    def _encode_array(self, array: np.ndarray):
+        if array.dtype.hasobject:
+            raise TypeError("Cannot encode object arrays")
+        array = np.ascontiguousarray(array)
+        self.out += _ARRAY
+        self._raw(array.dtype.str.encode('ascii'))
+        self.out += _U32.pack(array.ndim)
+        for dim in array.shape:
+            self.out += _I64.pack(dim)
+        self.out += _U32.pack(self._oob(array.reshape(-1).view(np.uint8)))
+
+class _Decoder:
+    def __init__(self, header: memoryview, buffers: List[memoryview]):
+        self.header = header
+        self.buffers = buffers
+        self.pos = 0
+
+    def _u32(self) -> int:
+        value = _U32.unpack_from(self.header, self.pos)[0]
+        self.pos += 4
+        return value
+
+    def _raw(self) -> memoryview:
+        length = self._u32()
+        data = self.header[self.pos:self.pos + length]
+        self.pos += length
+        return data
+
+    def decode(self) -> Any:
+        tag = bytes(self.header[self.pos:self.pos + 1])
+        self.pos += 1
+        if tag == _NONE:
+            return None
+        if tag == _TRUE:
+            return True
+        if tag == _FALSE:
+            return False
+        if tag == _INT:
+            value = _I64.unpack_from(self.header, self.pos)[0]
+            self.pos += 8
+            return value
+        if tag == _BIGINT:
+            return int(str(self._raw(), 'ascii'))
+        if tag == _FLOAT:
+            value = _F64.unpack_from(self.header, self.pos)[0]
+            self.pos += 8
+            return value
+        if tag == _STR:
+            return str(self._raw(), 'utf-8')
+        if tag == _BYTES:
+            return bytes(self._raw())
+        if tag == _OOB_STR:
+            return str(self.buffers[self._u32()], 'utf-8')
+        if tag == _OOB_BYTES:
+            return self.buffers[self._u32()]
+        if tag == _LIST:
+            return [self.decode() for _ in range(self._u32())]
+        if tag == _DICT:
+            result = {}
+            for _ in range(self._u32()):
+                key = self.decode()
+                result[key] = self.decode()
+            return result
+        if tag == _ARRAY:
+            dtype = np.dtype(str(self._raw(), 'ascii'))
+            shape = []
+            for _ in range(self._u32()):
+                shape.append(_I64.unpack_from(self.header, self.pos)[0])
+                self.pos += 8
+            return np.frombuffer(self.buffers[self._u32()], dtype=dtype).reshape(shape)
+        raise ValueError(f"Unknown tag {tag!r} at offset {self.pos - 1}")
+
+def encode_message(message: MCPMessage,
+                   threshold: int = OUT_OF_BAND_THRESHOLD) -> Tuple[bytes, List[memoryview]]:
+    """Encode a message into a header and a list of out-of-band buffers.
+
+    The buffers are views of the payload's arrays and large strings, so a
+    transport that supports scatter writes can send them without copying.
+    """
+    encoder = _Encoder(threshold)
+    for value in message.to_tuple():
+        encoder.encode(value)
+    return bytes(encoder.out), encoder.buffers
+
+def decode_message(header: BufferLike, buffers: List[BufferLike]) -> MCPMessage:
+    """Decode a message from a header and its out-of-band buffers.
+
+    Arrays and large byte strings in the payload are views over the given
+    buffers, not copies.
+    """
+    decoder = _Decoder(memoryview(header), [memoryview(b) for b in buffers])
+    return MCPMessage.from_tuple(tuple(decoder.decode() for _ in range(MCPMessage.FIELD_COUNT)))
+
+def pack_message(message: MCPMessage, threshold: int = OUT_OF_BAND_THRESHOLD) -> bytes:
+    """Encode a message into a single self-describing frame"""
+    header, buffers = encode_message(message, threshold)
+
+    table_size = 4 + _SPAN.size * len(buffers)
+    position = len(MAGIC) + 4 + len(header) + table_size
+    spans = []
+    for buffer in buffers:
+        position += -position % BUFFER_ALIGNMENT
+        spans.append((position, buffer.nbytes))
+        position += buffer.nbytes
+
+    frame = bytearray(position)
+    frame[0:4] = MAGIC
+    _U32.pack_into(frame, 4, len(header))
+    frame[8:8 + len(header)] = header
+    cursor = 8 + len(header)
+    _U32.pack_into(frame, cursor, len(buffers))
+    cursor += 4
+    for (offset, length), buffer in zip(spans, buffers):
+        _SPAN.pack_into(frame, cursor, offset, length)
+        cursor += _SPAN.size
+        frame[offset:offset + length] = buffer
+    return bytes(frame)
+
+def unpack_message(frame: BufferLike) -> MCPMessage:
+    """Decode a frame produced by pack_message without copying its buffers"""
+    view = memoryview(frame)
+    if bytes(view[0:4]) != MAGIC:
+        raise ValueError("Not an MCP message frame")
+    header_length = _U32.unpack_from(view, 4)[0]
+    header = view[8:8 + header_length]
+    cursor = 8 + header_length
+    count = _U32.unpack_from(view, cursor)[0]
+    cursor += 4
+    buffers = []
+    for _ in range(count):
+        offset, length = _SPAN.unpack_from(view, cursor)
+        cursor += _SPAN.size
+        buffers.append(view[offset:offset + length])
+    return decode_message(header, buffers)
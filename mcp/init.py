@@ -1,4 +1,6 @@
-from .message_protocol import MCPMessage, MessageType, generate_trace_id
+from .message_protocol import MCPMessage, MessageType, DeadlineExceeded, generate_trace_id
 from .message_bus import MessageBus, message_bus
+from .codec import encode_message, decode_message, pack_message, unpack_message
 
-__all__ = ['MCPMessage', 'MessageType', 'generate_trace_id', 'MessageBus', 'message_bus']
\ No newline at end of file
+__all__ = ['MCPMessage', 'MessageType', 'DeadlineExceeded', 'generate_trace_id', 'MessageBus', 'message_bus',
+           'encode_message', 'decode_message', 'pack_message', 'unpack_message']
\ No newline at end of file
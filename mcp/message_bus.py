@@ -1,12 +1,15 @@
 import asyncio
-from typing import Dict, List, Callable
+from collections import deque
+from typing import Deque, Dict, List, Callable
 from .message_protocol import MCPMessage
 import logging
 
 class MessageBus:
-    def __init__(self):
+    def __init__(self, history_size: int = 1000):
         self.subscribers: Dict[str, List[Callable]] = {}
-        self.message_history: List[MCPMessage] = []
+        # Recent message headers only: payloads carry whole documents' chunks
+        # and query embeddings, which must not outlive their trace
+        self.message_history: Deque[MCPMessage] = deque(maxlen=history_size)
         self.logger = logging.getLogger(__name__)
     
     def subscribe(self, agent_name: str, callback: Callable):
@@ -17,7 +20,15 @@ class MessageBus:
     
     async def publish(self, message: MCPMessage):
         """Publish a message to the intended receiver"""
-        self.message_history.append(message)
+        self.message_history.append(MCPMessage(
+            sender=message.sender,
+            receiver=message.receiver,
+            type=message.type,
+            trace_id=message.trace_id,
+            payload={},
+            timestamp=message.timestamp,
+            deadline=message.deadline
+        ))
         self.logger.info(f"Publishing message: {message.sender} -> {message.receiver} ({message.type.value})")
         
         if message.receiver in self.subscribers:
@@ -28,10 +39,10 @@ class MessageBus:
                     self.logger.error(f"Error in callback for {message.receiver}: {e}")
     
     def get_message_history(self, trace_id: str = None) -> List[MCPMessage]:
-        """Get message history, optionally filtered by trace_id"""
+        """Get recent message headers, optionally filtered by trace_id"""
         if trace_id:
             return [msg for msg in self.message_history if msg.trace_id == trace_id]
-        return self.message_history
+        return list(self.message_history)
 
 # Global message bus instance
 message_bus = MessageBus()
\ No newline at end of file
@@ -1,12 +1,13 @@
-from dataclasses import dataclass
-from typing import Any, Dict, Optional
+from typing import Any, ClassVar, Dict, Optional, Tuple
 import uuid
 from enum import Enum
 import json
+import time
 
 class MessageType(Enum):
     INGESTION_REQUEST = "INGESTION_REQUEST"
     INGESTION_RESPONSE = "INGESTION_RESPONSE"
+    INGESTION_STATUS = "INGESTION_STATUS"
     RETRIEVAL_REQUEST = "RETRIEVAL_REQUEST"
     RETRIEVAL_RESPONSE = "RETRIEVAL_RESPONSE"
     LLM_REQUEST = "LLM_REQUEST"
@@ -14,14 +15,36 @@ class MessageType(Enum):
     CONTEXT_RESPONSE = "CONTEXT_RESPONSE"
     ERROR = "ERROR"
 
-@dataclass
+class DeadlineExceeded(Exception):
+    """Raised when a trace's deadline passes before a stage starts its work"""
+    pass
+
 class MCPMessage:
-    sender: str
-    receiver: str
-    type: MessageType
-    trace_id: str
-    payload: Dict[str, Any]
-    timestamp: Optional[str] = None
+    # Written out by hand rather than as @dataclass(slots=True), which needs Python 3.10
+    __slots__ = ('sender', 'receiver', 'type', 'trace_id', 'payload', 'timestamp', 'deadline')
+    FIELD_COUNT: ClassVar[int] = 7
+    
+    def __init__(self, sender: str, receiver: str, type: MessageType, trace_id: str,
+                 payload: Dict[str, Any], timestamp: Optional[str] = None,
+                 deadline: Optional[float] = None):
+        self.sender = sender
+        self.receiver = receiver
+        self.type = type
+        self.trace_id = trace_id
+        self.payload = payload
+        self.timestamp = timestamp
+        self.deadline = deadline  # absolute time.time() by which the trace must finish
+    
+    def __repr__(self) -> str:
+        fields = ', '.join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"MCPMessage({fields})"
+    
+    def __eq__(self, other: Any) -> bool:
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+    
+    __hash__ = None
     
     def to_dict(self) -> Dict[str, Any]:
         return {
@@ -30,7 +53,8 @@ class MCPMessage:
             "type": self.type.value,
             "trace_id": self.trace_id,
             "payload": self.payload,
-            "timestamp": self.timestamp
+            "timestamp": self.timestamp,
+            "deadline": self.deadline
         }
     
     @classmethod
@@ -41,8 +65,45 @@ class MCPMessage:
             type=MessageType(data["type"]),
             trace_id=data["trace_id"],
             payload=data["payload"],
-            timestamp=data.get("timestamp")
+            timestamp=data.get("timestamp"),
+            deadline=data.get("deadline")
         )
+    
+    def to_tuple(self) -> Tuple[Any, ...]:
+        return (self.sender, self.receiver, self.type.value, self.trace_id,
+                self.timestamp, self.deadline, self.payload)
+    
+    @classmethod
+    def from_tuple(cls, values: Tuple[Any, ...]) -> 'MCPMessage':
+        sender, receiver, message_type, trace_id, timestamp, deadline, payload = values
+        return cls(
+            sender=sender,
+            receiver=receiver,
+            type=MessageType(message_type),
+            trace_id=trace_id,
+            payload=payload,
+            timestamp=timestamp,
+            deadline=deadline
+        )
+    
+    def time_remaining(self) -> Optional[float]:
+        """Seconds left before the deadline, or None if there is no deadline"""
+        if self.deadline is None:
+            return None
+        return self.deadline - time.time()
+    
+    def is_expired(self) -> bool:
+        return self.deadline is not None and time.time() >= self.deadline
+    
+    def to_bytes(self) -> bytes:
+        """Encode as a compact binary frame (see mcp.codec)"""
+        from .codec import pack_message
+        return pack_message(self)
+    
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'MCPMessage':
+        from .codec import unpack_message
+        return unpack_message(data)
 
 def generate_trace_id() -> str:
     return str(uuid.uuid4())[:8]
\ No newline at end of file
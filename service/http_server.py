@@ -0,0 +1,214 @@
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import tempfile
+from typing import Any, Dict, Optional
+from aiohttp import web
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from agents.coordinator_agent import CoordinatorAgent
+from agents.ingestion_agent import IngestionAgent
+from agents.retrieval_agent import RetrievalAgent
+from agents.llm_response_agent import LLMResponseAgent
+from utils.rate_limiter import openai_limiter
+
+AGENTS = web.AppKey('agents', dict)
+UPLOAD_DIR = web.AppKey('upload_dir', str)
+QUERY_SLOTS = web.AppKey('query_slots', asyncio.Semaphore)
+MAX_UPLOAD_BYTES = web.AppKey('max_upload_bytes', int)
+
+SUPPORTED_TYPES = {'pdf', 'docx', 'pptx', 'csv', 'txt', 'md'}
+
+logger = logging.getLogger(__name__)
+
+def initialize_agents() -> Dict[str, Any]:
+    """Initialize all agents"""
+    return {
+        'ingestion': IngestionAgent(),
+        'retrieval': RetrievalAgent(),
+        'llm': LLMResponseAgent(),
+        'coordinator': CoordinatorAgent()
+    }
+
+async def _read_json(request: web.Request) -> Dict[str, Any]:
+    try:
+        body = await request.json()
+    except ValueError:
+        raise web.HTTPBadRequest(reason="Request body must be JSON")
+    if not isinstance(body, dict):
+        raise web.HTTPBadRequest(reason="Request body must be a JSON object")
+    return body
+
+def _read_timeout(body: Dict[str, Any]) -> Optional[float]:
+    timeout = body.get('timeout')
+    if timeout is None:
+        return None
+    if isinstance(timeout, bool) or not isinstance(timeout, (int, float)) or not 0 < timeout < float('inf'):
+        raise web.HTTPBadRequest(reason="'timeout' must be a positive number of seconds")
+    return float(timeout)
+
+async def handle_query(request: web.Request) -> web.Response:
+    """POST /query {"query": ..., "conversation_id": ..., "timeout": ...}"""
+    body = await _read_json(request)
+    query = body.get('query')
+    if not isinstance(query, str) or not query.strip():
+        raise web.HTTPBadRequest(reason="'query' must be a non-empty string")
+    conversation_id = body.get('conversation_id')
+    if conversation_id is not None and (not isinstance(conversation_id, str) or not conversation_id):
+        raise web.HTTPBadRequest(reason="'conversation_id' must be a non-empty string")
+    timeout = _read_timeout(body)
+
+    coordinator = request.app[AGENTS]['coordinator']
+    async with request.app[QUERY_SLOTS]:
+        result = await coordinator.process_user_query(
+            query, conversation_id=conversation_id, timeout=timeout
+        )
+    return web.json_response(result)
+
+async def handle_batch_query(request: web.Request) -> web.Response:
+    """POST /batch-query {"queries": [...], "timeout": ...}"""
+    body = await _read_json(request)
+    queries = body.get('queries')
+    if not isinstance(queries, list) or not queries or not all(isinstance(q, str) and q.strip() for q in queries):
+        raise web.HTTPBadRequest(reason="'queries' must be a non-empty list of strings")
+    timeout = _read_timeout(body)
+
+    coordinator = request.app[AGENTS]['coordinator']
+    slots = request.app[QUERY_SLOTS]
+
+    async def run(query: str) -> Dict[str, Any]:
+        async with slots:
+            return await coordinator.process_user_query(query, timeout=timeout)
+
+    # Concurrent queries are coalesced by the retrieval micro-batcher
+    results = await asyncio.gather(*(run(query) for query in queries))
+    return web.json_response({'results': results})
+
+async def handle_upload(request: web.Request) -> web.Response:
+    """POST /upload (multipart/form-data, one or more file fields)"""
+    if not request.content_type.startswith('multipart/'):
+        raise web.HTTPBadRequest(reason="Upload must be multipart/form-data")
+
+    # client_max_size does not apply to the streaming multipart reader, so
+    # the size limit is enforced here. Every part is saved and checked
+    # before any job is queued; on failure all saved files are removed.
+    max_bytes = request.app[MAX_UPLOAD_BYTES]
+    received = 0
+    saved = []
+    try:
+        reader = await request.multipart()
+        async for part in reader:
+            if not part.filename:
+                continue
+            file_type = part.filename.rsplit('.', 1)[-1].lower()
+            if file_type not in SUPPORTED_TYPES:
+                raise web.HTTPBadRequest(reason=f"Unsupported file type: {part.filename}")
+
+            # Stream the upload to disk
+            fd, file_path = tempfile.mkstemp(suffix=f".{file_type}", dir=request.app[UPLOAD_DIR])
+            saved.append((file_path, file_type, part.filename))
+            with os.fdopen(fd, 'wb') as f:
+                while chunk := await part.read_chunk():
+                    received += len(chunk)
+                    if received > max_bytes:
+                        raise web.HTTPRequestEntityTooLarge(max_size=max_bytes, actual_size=received)
+                    f.write(chunk)
+    except BaseException:
+        for file_path, _, _ in saved:
+            os.remove(file_path)
+        raise
+
+    if not saved:
+        raise web.HTTPBadRequest(reason="No files in upload")
+
+    # Queue the files for background ingestion
+    coordinator = request.app[AGENTS]['coordinator']
+    jobs = []
+    for file_path, file_type, file_name in saved:
+        job = await coordinator.process_document_upload(file_path, file_type, delete_after=True)
+        jobs.append(dict(job, file_name=file_name))
+    return web.json_response({'jobs': jobs}, status=202)
+
+async def handle_status(request: web.Request) -> web.Response:
+    """GET /status: ingestion jobs and agent statistics"""
+    agents = request.app[AGENTS]
+    coordinator, retrieval = agents['coordinator'], agents['retrieval']
+    return web.json_response({
+        'ingestion': coordinator.get_ingestion_status(),
+        'sessions': coordinator.sessions.get_stats(),
+        'parse_cache': agents['ingestion'].get_cache_stats(),
+        'vector_store': retrieval.vector_store.get_stats(),
+        'retrieval_batching': retrieval.query_batcher.get_stats(),
+        'followups': retrieval.followup_stats,
+        'deduplication': retrieval.deduplicator.get_stats(),
+        'upstream_limiter': openai_limiter.get_stats()
+    })
+
+async def handle_job_status(request: web.Request) -> web.Response:
+    """GET /status/{job_id}"""
+    job = request.app[AGENTS]['coordinator'].ingestion_jobs.get_job(request.match_info['job_id'])
+    if job is None:
+        raise web.HTTPNotFound(reason="Unknown job")
+    return web.json_response(job.to_dict())
+
+async def handle_job_retry(request: web.Request) -> web.Response:
+    """POST /jobs/{job_id}/retry"""
+    try:
+        job = await request.app[AGENTS]['coordinator'].retry_ingestion(request.match_info['job_id'])
+    except KeyError:
+        raise web.HTTPNotFound(reason="Unknown job")
+    except ValueError as e:
+        raise web.HTTPConflict(reason=str(e))
+    return web.json_response(job, status=202)
+
+async def handle_health(request: web.Request) -> web.Response:
+    return web.json_response({'status': 'ok'})
+
+async def _shutdown_agents(app: web.Application):
+    # Runs after in-flight requests have finished or timed out
+    logger.info("Shutting down agents")
+    await app[AGENTS]['coordinator'].shutdown()
+
+def create_app(agents: Dict[str, Any] = None, upload_dir: str = None,
+               max_concurrent_queries: int = 64, max_upload_bytes: int = 200 * 1024 * 1024) -> web.Application:
+    """Build the HTTP application hosting the agents on the running event loop"""
+    app = web.Application(client_max_size=max_upload_bytes)
+    app[AGENTS] = agents or initialize_agents()
+    app[UPLOAD_DIR] = upload_dir or tempfile.mkdtemp(prefix='dot_uploads_')
+    app[QUERY_SLOTS] = asyncio.Semaphore(max_concurrent_queries)
+    app[MAX_UPLOAD_BYTES] = max_upload_bytes
+    app.add_routes([
+        web.post('/query', handle_query),
+        web.post('/batch-query', handle_batch_query),
+        web.post('/upload', handle_upload),
+        web.get('/status', handle_status),
+        web.get('/status/{job_id}', handle_job_status),
+        web.post('/jobs/{job_id}/retry', handle_job_retry),
+        web.get('/health', handle_health)
+    ])
+    app.on_cleanup.append(_shutdown_agents)
+    return app
+
+def main():
+    parser = argparse.ArgumentParser(description="DOT agent HTTP service")
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--upload-dir', default=None)
+    parser.add_argument('--max-concurrent-queries', type=int, default=64)
+    parser.add_argument('--shutdown-timeout', type=float, default=30.0,
+                        help="Seconds to let in-flight requests finish on shutdown")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    web.run_app(
+        create_app(upload_dir=args.upload_dir, max_concurrent_queries=args.max_concurrent_queries),
+        host=args.host,
+        port=args.port,
+        shutdown_timeout=args.shutdown_timeout
+    )
+
+if __name__ == "__main__":
+    main()
@@ -2,6 +2,8 @@ import streamlit as st
 import asyncio
 import os
 import tempfile
+import threading
+import uuid
 from typing import Dict, Any
 import sys
 # sys.path.append('..')
@@ -12,6 +14,7 @@ from agents.coordinator_agent import CoordinatorAgent
 from agents.ingestion_agent import IngestionAgent
 from agents.retrieval_agent import RetrievalAgent
 from agents.llm_response_agent import LLMResponseAgent
+from utils.rate_limiter import openai_limiter
 import logging
 
 # Configure logging
@@ -33,6 +36,27 @@ def initialize_agents():
         'coordinator': coordinator_agent
     }
 
+@st.cache_resource
+def get_event_loop():
+    """Start a persistent event loop in a background thread for the agents"""
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+    return loop
+
+def run_async(coro):
+    """Run a coroutine on the agents' event loop and wait for its result"""
+    return asyncio.run_coroutine_threadsafe(coro, get_event_loop()).result()
+
+def read_on_loop(read, *args):
+    """Call a synchronous read of agent state on the agents' event loop.
+    
+    Job tables, limiter buckets and dedupe stats are mutated by the loop
+    thread, so the script thread must not read them directly.
+    """
+    async def call():
+        return read(*args)
+    return run_async(call())
+
 def main():
     st.set_page_config(
         page_title="Agentic RAG Chatbot",
@@ -52,6 +76,8 @@ def main():
         st.session_state.messages = []
     if 'uploaded_files' not in st.session_state:
         st.session_state.uploaded_files = []
+    if 'conversation_id' not in st.session_state:
+        st.session_state.conversation_id = str(uuid.uuid4())
     
     # Sidebar for file upload
     with st.sidebar:
@@ -71,26 +97,39 @@ def main():
                         tmp_file.write(uploaded_file.getvalue())
                         tmp_path = tmp_file.name
                     
-                    # Process document
-                    with st.spinner(f"Processing {uploaded_file.name}..."):
-                        result = asyncio.run(coordinator.process_document_upload(
-                            tmp_path, 
-                            uploaded_file.name.split('.')[-1]
-                        ))
+                    # Queue document for background ingestion
+                    result = run_async(coordinator.process_document_upload(
+                        tmp_path, 
+                        uploaded_file.name.split('.')[-1],
+                        delete_after=True
+                    ))
                     
                     st.session_state.uploaded_files.append({
                         'name': uploaded_file.name,
                         'path': tmp_path,
-                        'status': 'processed'
+                        'job_id': result['job_id']
                     })
-                    
-                    st.success(f"✅ {uploaded_file.name} processed successfully!")
         
-        # Display uploaded files
+        # Display uploaded files with their ingestion status
         if st.session_state.uploaded_files:
             st.subheader("📄 Uploaded Files")
+            st.button("🔄 Refresh status")
             for file_info in st.session_state.uploaded_files:
-                st.write(f"• {file_info['name']}")
+                job = read_on_loop(coordinator.get_ingestion_status, file_info['job_id'])
+                status = job.get('status', 'unknown')
+                if status == 'completed':
+                    st.write(f"✅ {file_info['name']} ({job['chunks_embedded']} chunks, "
+                             f"{job['chunks_deduplicated']} duplicates)")
+                elif status == 'failed':
+                    st.write(f"❌ {file_info['name']}: {job.get('error')}")
+                    if st.button("Retry", key=f"retry_{file_info['job_id']}"):
+                        run_async(coordinator.retry_ingestion(file_info['job_id']))
+                        st.rerun()
+                elif status == 'running':
+                    st.write(f"⏳ {file_info['name']}: {job['pages_parsed']} pages parsed, "
+                             f"{job['chunks_embedded']}/{job['chunks_total']} chunks embedded")
+                else:
+                    st.write(f"🕒 {file_info['name']}: {status}")
     
     # Main chat interface
     st.header("💬 Chat Interface")
@@ -116,7 +155,9 @@ def main():
         # Get response from coordinator
         with st.chat_message("assistant"):
             with st.spinner("Thinking..."):
-                response = asyncio.run(coordinator.process_user_query(prompt))
+                response = run_async(coordinator.process_user_query(
+                    prompt, conversation_id=st.session_state.conversation_id
+                ))
             
             st.markdown(response.get('response', 'No response generated'))
             
@@ -143,7 +184,26 @@ def main():
         st.write("LLM Response Agent: Active")
         st.write("Coordinator Agent: Active")
         
-        st.write(f"**Documents Processed:** {len(st.session_state.uploaded_files)}")
+        # One consistent snapshot taken on the loop
+        stats, cache_stats, dedupe_stats, limiter_stats = read_on_loop(lambda: (
+            coordinator.ingestion_jobs.get_stats(),
+            agents['ingestion'].get_cache_stats(),
+            agents['retrieval'].deduplicator.get_stats(),
+            openai_limiter.get_stats()
+        ))
+        st.write(f"**Documents Processed:** {stats['completed']} of {stats['total_jobs']}")
+        
+        st.write(f"**Parse Cache:** {cache_stats['hit_rate']:.0%} hit rate, "
+                 f"{(cache_stats['memory_bytes'] + cache_stats['disk_bytes']) / 1024:.0f} KB "
+                 f"({cache_stats['memory_entries']} in memory, {cache_stats['disk_entries']} on disk)")
+        
+        st.write(f"**Deduplication:** {dedupe_stats['unique']} unique chunks, "
+                 f"{dedupe_stats['exact_duplicates']} exact repeats skipped, {dedupe_stats['near_duplicates']} near duplicates kept")
+        
+        waits = limiter_stats['queue_wait_seconds']
+        st.write(f"**OpenAI Limiter:** concurrency {limiter_stats['concurrency_limit']}, "
+                 f"{limiter_stats['throttled']} rate-limited, "
+                 f"avg wait {waits['interactive']['avg']:.2f}s interactive / {waits['bulk']['avg']:.2f}s bulk")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,205 @@
+import hashlib
+import math
+import re
+import zlib
+from collections import Counter, defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64(0xFFFFFFFF)
+
+_WHITESPACE = re.compile(r'\s+')
+# Labelled page/slide numbering in headers and footers: "Page 3 of 10",
+# "Slide 4", "p. 7"
+_PAGE_LABEL = re.compile(r'\b(?:page|slide|p\.)\s*\d+(?:\s*(?:of|/)\s*\d+)?\b')
+# A line holding only a number, e.g. "12", "- 12 -" or "12 / 40"
+_BARE_NUMBER = re.compile(r'^[-\s]*(\d+)(?:\s*(?:of|/)\s*\d+)?[-\s]*$')
+
+# Kinds returned by ChunkDeduplicator.assign
+UNIQUE = 'unique'
+LOCAL = 'local'
+INDEXED = 'indexed'
+
+Signature = Tuple[bytes, np.ndarray]
+
+def _normalize_line(line: str, page_number: bool = False) -> str:
+    line = _WHITESPACE.sub(' ', line.lower()).strip()
+    if page_number:
+        return '#'
+    # Page numbers are the only part of a header or footer expected to vary
+    return _PAGE_LABEL.sub('#', line)
+
+def _page_number_offset(line: str, page: int) -> Optional[int]:
+    """For a bare-number line, its value minus the page's position"""
+    match = _BARE_NUMBER.match(line)
+    return int(match.group(1)) - page if match else None
+
+def _edge_lines(lines: List[str], edge_lines: int) -> List[int]:
+    """Indices of the first and last `edge_lines` non-empty lines"""
+    filled = [i for i, line in enumerate(lines) if line.strip()]
+    return sorted(set(filled[:edge_lines] + filled[-edge_lines:]))
+
+def strip_boilerplate(texts: List[str], min_fraction: float = 0.5, min_occurrences: int = 3,
+                      edge_lines: int = 3, max_page_offset: int = 10) -> Tuple[List[str], int]:
+    """Remove headers and footers repeated across the pages of a document.
+
+    Only the first and last `edge_lines` lines of each page are considered.
+    Such a line is boilerplate when, ignoring case, whitespace and page
+    numbers, it sits at the edge of at least `min_fraction` of the pages
+    and of no fewer than `min_occurrences` of them. A line holding only a
+    number counts as a page number only if it follows the page order,
+    i.e. equals the page's position plus an offset shared by enough pages
+    and no larger than `max_page_offset`; other bare numbers are data.
+    Meant for page- or slide-sized chunks; returns the stripped texts and
+    the number of lines removed.
+    """
+    threshold = max(min_occurrences, math.ceil(min_fraction * len(texts)))
+    if len(texts) < threshold:
+        return texts, 0
+
+    pages = [text.splitlines() for text in texts]
+    edges = [_edge_lines(lines, edge_lines) for lines in pages]
+
+    offsets = Counter()
+    for page, (lines, positions) in enumerate(zip(pages, edges), start=1):
+        offsets.update({_page_number_offset(lines[i], page) for i in positions} - {None})
+    page_offsets = {offset for offset, count in offsets.items()
+                    if count >= threshold and abs(offset) <= max_page_offset}
+
+    normalized = [
+        {i: _normalize_line(lines[i], _page_number_offset(lines[i], page) in page_offsets) for i in positions}
+        for page, (lines, positions) in enumerate(zip(pages, edges), start=1)
+    ]
+    counts = Counter()
+    for page_lines in normalized:
+        counts.update(set(page_lines.values()))
+    boilerplate = {line for line, count in counts.items() if count >= threshold}
+    if not boilerplate:
+        return texts, 0
+
+    stripped, removed = [], 0
+    for text, lines, page_lines in zip(texts, pages, normalized):
+        drop = {i for i, line in page_lines.items() if line in boilerplate}
+        if not drop:
+            stripped.append(text)
+            continue
+        removed += len(drop)
+        stripped.append('\n'.join(line for i, line in enumerate(lines) if i not in drop).strip())
+    return stripped, removed
+
+class ChunkDeduplicator:
+    """Finds repeated chunks by exact match and near-identical ones with MinHash/LSH.
+
+    Exact repeats, with case and whitespace normalised but punctuation
+    kept, are collapsed: they are embedded once and stored as pointers.
+    Near duplicates, whose estimated Jaccard similarity over token
+    shingles reaches `threshold`, are only counted. They can differ in the
+    one figure a query is after, so they keep their own text and
+    embedding. Each unique chunk is registered under a (document_id,
+    chunk_index) key, which maps to its vector store position once it
+    has been indexed.
+    """
+
+    def __init__(self, threshold: float = 0.85, num_perm: int = 64, bands: int = 16,
+                 shingle_size: int = 3, seed: int = 1):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, 1 << 32, num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, 1 << 32, num_perm, dtype=np.uint64)
+
+        self._exact: Dict[bytes, Tuple[str, int]] = {}
+        self._buckets: List[Dict[bytes, List[Tuple[str, int]]]] = [defaultdict(list) for _ in range(bands)]
+        self._signatures: Dict[Tuple[str, int], np.ndarray] = {}
+        self._positions: Dict[Tuple[str, int], int] = {}
+        self.stats = {'unique': 0, 'exact_duplicates': 0, 'near_duplicates': 0}
+
+    def signature(self, text: str) -> Signature:
+        """Exact-match key and MinHash signature of a chunk"""
+        # Punctuation and signs are kept: "-5" and "5" are different chunks
+        words = text.lower().split()
+        exact_key = hashlib.blake2b(' '.join(words).encode('utf-8'), digest_size=16).digest()
+
+        size = min(self.shingle_size, len(words)) or 1
+        shingles = {' '.join(words[i:i + size]) for i in range(max(len(words) - size + 1, 1))}
+        hashes = np.fromiter((zlib.crc32(s.encode('utf-8')) for s in shingles),
+                             dtype=np.uint64, count=len(shingles))
+        # Universal hashing (a*x + b) mod p; a, b and x are below 2**32, so no overflow
+        permuted = (self._a[:, None] * hashes[None, :] + self._b[:, None]) % _MERSENNE_PRIME
+        minhash = (permuted & _MAX_HASH).min(axis=1).astype(np.uint32)
+        return exact_key, minhash
+
+    def signatures(self, texts: List[str]) -> List[Signature]:
+        return [self.signature(text) for text in texts]
+
+    def assign(self, document_id: str, signatures: List[Signature]) -> List[Tuple[str, int]]:
+        """Classify a document's chunks against everything seen so far.
+
+        Returns one (kind, ref) pair per chunk: (UNIQUE, i) for a chunk to
+        embed, (LOCAL, j) for an exact repeat of unique chunk j of the same
+        document, or (INDEXED, position) for an exact repeat of an indexed
+        chunk. Unique chunks are registered straight away; call `resolve`
+        with their positions once they have been indexed.
+        """
+        assignments = []
+        unique = set()
+        for i, (exact_key, minhash) in enumerate(signatures):
+            key = self._exact.get(exact_key)
+            if key is not None and key[0] == document_id and key[1] in unique:
+                assignment = (LOCAL, key[1])
+            elif key in self._positions:
+                assignment = (INDEXED, self._positions[key])
+            else:
+                # New text, or a repeat of a chunk whose document is still
+                # being (or failed to be) indexed
+                assignment = None
+
+            if assignment is not None:
+                self.stats['exact_duplicates'] += 1
+            else:
+                if self._has_near_duplicate(minhash):
+                    self.stats['near_duplicates'] += 1
+                assignment = (UNIQUE, i)
+                unique.add(i)
+                self._register((document_id, i), exact_key, minhash)
+                self.stats['unique'] += 1
+            assignments.append(assignment)
+        return assignments
+
+    def resolve(self, document_id: str, positions: Dict[int, int]):
+        """Record the vector store positions of a document's unique chunks"""
+        for chunk_index, position in positions.items():
+            self._positions[(document_id, chunk_index)] = position
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            'indexed_chunks': len(self._positions),
+            'threshold': self.threshold
+        }
+
+    def _register(self, key: Tuple[str, int], exact_key: bytes, minhash: np.ndarray):
+        # Keep pointing at an indexed chunk rather than a pending or failed one
+        if self._exact.get(exact_key) not in self._positions:
+            self._exact[exact_key] = key
+        self._signatures[key] = minhash
+        for band, buckets in enumerate(self._buckets):
+            buckets[minhash[band * self.rows:(band + 1) * self.rows].tobytes()].append(key)
+
+    def _has_near_duplicate(self, minhash: np.ndarray) -> bool:
+        """Whether a registered chunk's estimated similarity reaches the threshold"""
+        seen = set()
+        for band, buckets in enumerate(self._buckets):
+            for candidate in buckets.get(minhash[band * self.rows:(band + 1) * self.rows].tobytes(), ()):
+                if candidate in seen:
+                    continue
+                seen.add(candidate)
+                if np.mean(self._signatures[candidate] == minhash) >= self.threshold:
+                    return True
+        return False
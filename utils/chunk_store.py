@@ -0,0 +1,210 @@
+from array import array
+from typing import Any, Dict, List, Optional
+
+class ChunkView:
+    """Lightweight read-only view of one chunk in a ChunkStore"""
+    __slots__ = ('_store', 'index')
+
+    def __init__(self, store: 'ChunkStore', index: int):
+        self._store = store
+        self.index = index
+
+    @property
+    def text(self) -> str:
+        return self._store.get_text(self.index)
+
+    @property
+    def document_id(self) -> str:
+        return self._store.document_ids[self._store.doc_ordinals[self.index]]
+
+    @property
+    def chunk_id(self) -> int:
+        return self._store.chunk_ids[self.index]
+
+    @property
+    def section(self) -> Any:
+        return self._store.sections[self._store.section_codes[self.index]]
+
+    @property
+    def document_metadata(self) -> Dict[str, Any]:
+        return self._store.document_metadata[self._store.doc_ordinals[self.index]]
+
+    @property
+    def occurrences(self) -> List[Dict[str, Any]]:
+        """Every place this chunk's text occurs, starting with the stored copy"""
+        store = self._store
+        found = [{'document_id': self.document_id, 'chunk_id': self.chunk_id, 'section': self.section}]
+        for i in store.duplicates_of(self.index):
+            found.append({
+                'document_id': store.document_ids[store.dup_doc_ordinals[i]],
+                'chunk_id': store.dup_chunk_ids[i],
+                'section': store.sections[store.dup_section_codes[i]]
+            })
+        return found
+
+    @property
+    def metadata(self) -> Dict[str, Any]:
+        """Chunk metadata in the dict shape used in MCP payloads"""
+        doc_ordinal = self._store.doc_ordinals[self.index]
+        return {
+            'document_id': self._store.document_ids[doc_ordinal],
+            'chunk_id': self.chunk_id,
+            'document_metadata': self._store.document_metadata[doc_ordinal],
+            'chunk_metadata': {
+                'document_type': self._store.document_types[doc_ordinal],
+                'section': self.section
+            },
+            'occurrence_count': 1 + len(self._store.duplicates_of(self.index))
+        }
+
+    def __repr__(self) -> str:
+        return f"ChunkView({self.document_id!r}, chunk_id={self.chunk_id})"
+
+class ChunkStore:
+    """Columnar storage for chunk texts and metadata.
+
+    Document-level metadata is kept once per document. Per-chunk fields live
+    in typed arrays and texts are packed into one UTF-8 buffer with offsets.
+    Repeated chunks are stored once; their other occurrences are kept as
+    pointers to the stored chunk's position.
+    """
+
+    def __init__(self):
+        # Document-level columns, indexed by document ordinal
+        self.document_ids: List[str] = []
+        self.document_types: List[Optional[str]] = []
+        self.document_metadata: List[Dict[str, Any]] = []
+        self._document_ordinals: Dict[str, int] = {}
+
+        # Interned section values (page/slide/paragraph numbers or labels)
+        self.sections: List[Any] = []
+        self._section_codes: Dict[Any, int] = {}
+
+        # Chunk-level columns, indexed by chunk position
+        self.doc_ordinals = array('i')
+        self.chunk_ids = array('i')
+        self.section_codes = array('i')
+        self.text_offsets = array('q', [0])
+        self.text_buffer = bytearray()
+
+        # Duplicate occurrences, each pointing at a stored chunk position
+        self.dup_positions = array('i')
+        self.dup_doc_ordinals = array('i')
+        self.dup_chunk_ids = array('i')
+        self.dup_section_codes = array('i')
+        self._duplicates: Dict[int, List[int]] = {}
+
+    def __len__(self) -> int:
+        return len(self.chunk_ids)
+
+    def __getitem__(self, index: int) -> ChunkView:
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        return ChunkView(self, index)
+
+    def add_document(self, document_id: str, texts: List[str], sections: List[Any],
+                     document_metadata: Dict[str, Any] = None, document_type: str = None,
+                     chunk_ids: List[int] = None) -> int:
+        """Append the chunks of a document and return the position of its first chunk.
+
+        `chunk_ids` gives each chunk's index within the document when only
+        some of its chunks are stored; it defaults to 0..len(texts)-1.
+        """
+        if len(texts) != len(sections):
+            raise ValueError("texts and sections must have the same length")
+
+        doc_ordinal = self._document_ordinal(document_id, document_metadata, document_type)
+        if chunk_ids is None:
+            chunk_ids = range(len(texts))
+
+        start = len(self)
+        for chunk_id, text, section in zip(chunk_ids, texts, sections):
+            self.doc_ordinals.append(doc_ordinal)
+            self.chunk_ids.append(chunk_id)
+            self.section_codes.append(self._intern_section(section))
+            self.text_buffer += text.encode('utf-8')
+            self.text_offsets.append(len(self.text_buffer))
+        return start
+
+    def add_duplicates(self, document_id: str, positions: List[int], chunk_ids: List[int],
+                       sections: List[Any], document_metadata: Dict[str, Any] = None,
+                       document_type: str = None):
+        """Record chunks of a document that repeat chunks already stored at `positions`"""
+        if not len(positions) == len(chunk_ids) == len(sections):
+            raise ValueError("positions, chunk_ids and sections must have the same length")
+
+        doc_ordinal = self._document_ordinal(document_id, document_metadata, document_type)
+        for position, chunk_id, section in zip(positions, chunk_ids, sections):
+            if not 0 <= position < len(self):
+                raise IndexError(position)
+            self._duplicates.setdefault(position, []).append(len(self.dup_positions))
+            self.dup_positions.append(position)
+            self.dup_doc_ordinals.append(doc_ordinal)
+            self.dup_chunk_ids.append(chunk_id)
+            self.dup_section_codes.append(self._intern_section(section))
+
+    def duplicates_of(self, index: int) -> List[int]:
+        """Indices into the dup_* columns of the repeats of a stored chunk"""
+        return self._duplicates.get(index, [])
+
+    def get_text(self, index: int) -> str:
+        start, end = self.text_offsets[index], self.text_offsets[index + 1]
+        return self.text_buffer[start:end].decode('utf-8')
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'total_documents': len(self.document_ids),
+            'total_chunks': len(self),
+            'duplicate_occurrences': len(self.dup_positions),
+            'text_bytes': len(self.text_buffer),
+            'distinct_sections': len(self.sections)
+        }
+
+    def __getstate__(self) -> Dict[str, Any]:
+        return {
+            'document_ids': self.document_ids,
+            'document_types': self.document_types,
+            'document_metadata': self.document_metadata,
+            'sections': self.sections,
+            'doc_ordinals': self.doc_ordinals,
+            'chunk_ids': self.chunk_ids,
+            'section_codes': self.section_codes,
+            'text_offsets': self.text_offsets,
+            'text_buffer': self.text_buffer,
+            'dup_positions': self.dup_positions,
+            'dup_doc_ordinals': self.dup_doc_ordinals,
+            'dup_chunk_ids': self.dup_chunk_ids,
+            'dup_section_codes': self.dup_section_codes
+        }
+
+    def __setstate__(self, state: Dict[str, Any]):
+        # Stores saved before duplicate tracking have no dup_* columns
+        for name in ('dup_positions', 'dup_doc_ordinals', 'dup_chunk_ids', 'dup_section_codes'):
+            state.setdefault(name, array('i'))
+        self.__dict__.update(state)
+        self._document_ordinals = {doc_id: i for i, doc_id in enumerate(self.document_ids)}
+        self._section_codes = {section: i for i, section in enumerate(self.sections)}
+        self._duplicates = {}
+        for i, position in enumerate(self.dup_positions):
+            self._duplicates.setdefault(position, []).append(i)
+
+    def _document_ordinal(self, document_id: str, document_metadata: Dict[str, Any] = None,
+                          document_type: str = None) -> int:
+        doc_ordinal = self._document_ordinals.get(document_id)
+        if doc_ordinal is None:
+            doc_ordinal = len(self.document_ids)
+            self._document_ordinals[document_id] = doc_ordinal
+            self.document_ids.append(document_id)
+            self.document_types.append(document_type)
+            self.document_metadata.append(document_metadata or {})
+        return doc_ordinal
+
+    def _intern_section(self, section: Any) -> int:
+        code = self._section_codes.get(section)
+        if code is None:
+            code = len(self.sections)
+            self._section_codes[section] = code
+            self.sections.append(section)
+        return code
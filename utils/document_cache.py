@@ -0,0 +1,159 @@
+import hashlib
+import json
+import os
+import stat
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+import logging
+
+class DocumentCache:
+    """Two-tier LRU cache of parsed documents keyed by file content hash.
+
+    Entries are held JSON-encoded in memory up to `max_memory_bytes`; the
+    least recently used ones spill to `cache_dir`, which is bounded by
+    `max_disk_bytes`. Disk entries survive restarts, so keys also cover a
+    version of how entries were produced.
+    """
+
+    # Bump when the stored entry layout changes
+    FORMAT_VERSION = 2
+
+    def __init__(self, cache_dir: str = None, max_memory_bytes: int = 64 * 1024 * 1024,
+                 max_disk_bytes: int = 512 * 1024 * 1024):
+        self.logger = logging.getLogger(__name__)
+        self.cache_dir = cache_dir or self._private_cache_dir()
+        self.max_memory_bytes = max_memory_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self._lock = threading.Lock()
+        self._memory: 'OrderedDict[str, bytes]' = OrderedDict()
+        self._disk: 'OrderedDict[str, int]' = OrderedDict()
+        self.memory_bytes = 0
+        self.disk_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._scan_disk()
+
+    @classmethod
+    def hash_file(cls, file_path: str, file_type: str, version: int = 0) -> str:
+        """Cache key for a file: SHA-256 of the cache format, the caller's
+        `version` of how entries are derived, the file type and content"""
+        header = f"{cls.FORMAT_VERSION}\0{version}\0{file_type.lower()}\0"
+        digest = hashlib.sha256(header.encode('utf-8'))
+        with open(file_path, 'rb') as f:
+            for block in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(block)
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            data = self._memory.get(key)
+            if data is not None:
+                self._memory.move_to_end(key)
+            elif key in self._disk:
+                try:
+                    with open(self._path(key), 'rb') as f:
+                        data = f.read()
+                except OSError as e:
+                    self.logger.warning(f"Dropping unreadable cache entry {key}: {e}")
+                    self.disk_bytes -= self._disk.pop(key)
+                else:
+                    # Promote back to memory
+                    self.disk_bytes -= self._disk.pop(key)
+                    os.remove(self._path(key))
+                    self._store_in_memory(key, data)
+
+            if data is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        try:
+            return json.loads(data)
+        except ValueError as e:
+            self.logger.warning(f"Ignoring corrupt cache entry {key}: {e}")
+            return None
+
+    def put(self, key: str, value: Dict[str, Any]):
+        data = json.dumps(value, default=str).encode('utf-8')
+        with self._lock:
+            if key in self._memory:
+                self.memory_bytes -= len(self._memory.pop(key))
+            self._store_in_memory(key, data)
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'memory_entries': len(self._memory),
+            'memory_bytes': self.memory_bytes,
+            'disk_entries': len(self._disk),
+            'disk_bytes': self.disk_bytes
+        }
+
+    def _private_cache_dir(self) -> str:
+        """Per-user cache directory under the temp dir, readable only by its owner.
+
+        If the path exists but belongs to someone else or is open to other
+        users, a fresh per-process directory is used instead.
+        """
+        path = os.path.join(tempfile.gettempdir(), f"dot_document_cache_{os.getuid()}")
+        try:
+            os.makedirs(path, mode=0o700, exist_ok=True)
+            info = os.lstat(path)
+            if stat.S_ISDIR(info.st_mode) and info.st_uid == os.getuid() and not info.st_mode & 0o077:
+                return path
+        except OSError:
+            pass
+        self.logger.warning(f"Not using shared cache directory {path}; falling back to a per-process one")
+        return tempfile.mkdtemp(prefix='dot_document_cache_')
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def _store_in_memory(self, key: str, data: bytes):
+        self._memory[key] = data
+        self.memory_bytes += len(data)
+        while self.memory_bytes > self.max_memory_bytes and self._memory:
+            spilled_key, spilled = self._memory.popitem(last=False)
+            self.memory_bytes -= len(spilled)
+            self._spill(spilled_key, spilled)
+
+    def _spill(self, key: str, data: bytes):
+        if len(data) > self.max_disk_bytes:
+            return
+        try:
+            with open(self._path(key), 'wb') as f:
+                f.write(data)
+        except OSError as e:
+            self.logger.warning(f"Could not spill cache entry {key} to disk: {e}")
+            return
+        if key in self._disk:
+            self.disk_bytes -= self._disk.pop(key)
+        self._disk[key] = len(data)
+        self.disk_bytes += len(data)
+        self._evict_disk()
+
+    def _evict_disk(self):
+        while self.disk_bytes > self.max_disk_bytes and self._disk:
+            evicted_key, size = self._disk.popitem(last=False)
+            self.disk_bytes -= size
+            try:
+                os.remove(self._path(evicted_key))
+            except OSError:
+                pass
+
+    def _scan_disk(self):
+        """Index entries left on disk by a previous run, oldest first"""
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if name.endswith('.json'):
+                info = os.stat(os.path.join(self.cache_dir, name))
+                entries.append((info.st_mtime, name[:-5], info.st_size))
+        for _, key, size in sorted(entries):
+            self._disk[key] = size
+            self.disk_bytes += size
+        self._evict_disk()
@@ -1,14 +1,33 @@
 import os
+import posixpath
+import zipfile
+import xml.etree.ElementTree as ET
 import pandas as pd
 import PyPDF2
 from docx import Document
 from pptx import Presentation
-from typing import Dict, Any
+from typing import Dict, Any, Iterator, List
 import logging
 
+# OOXML (transitional) namespaces used by the streaming DOCX/PPTX extractors
+W_NS = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+P_NS = '{http://schemas.openxmlformats.org/presentationml/2006/main}'
+A_NS = '{http://schemas.openxmlformats.org/drawingml/2006/main}'
+R_NS = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+PKG_REL_NS = '{http://schemas.openxmlformats.org/package/2006/relationships}'
+
+# Text equivalents of run content, matching python-docx's Run.text
+_DOCX_RUN_TEXT = {
+    W_NS + 'tab': '\t',
+    W_NS + 'ptab': '\t',
+    W_NS + 'cr': '\n',
+    W_NS + 'noBreakHyphen': '-'
+}
+
 class DocumentParser:
-    def __init__(self):
+    def __init__(self, fast_ooxml: bool = True):
         self.logger = logging.getLogger(__name__)
+        self.fast_ooxml = fast_ooxml
     
     def parse_document(self, file_path: str, file_type: str) -> Dict[str, Any]:
         """Parse document based on file type"""
@@ -51,14 +70,13 @@ class DocumentParser:
     
     def _parse_docx(self, file_path: str) -> Dict[str, Any]:
         """Parse DOCX file"""
-        doc = Document(file_path)
         paragraphs = []
         
-        for i, paragraph in enumerate(doc.paragraphs):
-            if paragraph.text.strip():
+        for i, text in enumerate(self._iter_docx_paragraph_texts(file_path)):
+            if text.strip():
                 paragraphs.append({
                     'paragraph': i + 1,
-                    'content': paragraph.text.strip()
+                    'content': text.strip()
                 })
         
         return {
@@ -70,20 +88,17 @@ class DocumentParser:
     
     def _parse_pptx(self, file_path: str) -> Dict[str, Any]:
         """Parse PPTX file"""
-        presentation = Presentation(file_path)
         slides_content = []
         
-        for slide_num, slide in enumerate(presentation.slides):
-            slide_text = []
-            for shape in slide.shapes:
-                if hasattr(shape, 'text'):
-                    if shape.text.strip():
-                        slide_text.append(shape.text.strip())
+        for slide_num, shape_texts in enumerate(self._iter_pptx_slide_texts(file_path)):
+            slide_text = [text.strip() for text in shape_texts if text.strip()]
             
             if slide_text:
+                # One line per shape, so repeated footers and template
+                # text boxes can be recognised across slides
                 slides_content.append({
                     'slide': slide_num + 1,
-                    'content': ' '.join(slide_text)
+                    'content': '\n'.join(slide_text)
                 })
         
         return {
@@ -93,6 +108,128 @@ class DocumentParser:
             'metadata': {'file_path': file_path}
         }
     
+    def _iter_docx_paragraph_texts(self, file_path: str) -> Iterator[str]:
+        """Yield the text of each body paragraph, streaming the XML when possible"""
+        if self.fast_ooxml:
+            try:
+                # Materialise so a parse failure can still fall back cleanly
+                return iter(list(self._stream_docx_paragraphs(file_path)))
+            except (KeyError, ValueError, ET.ParseError, zipfile.BadZipFile) as e:
+                self.logger.warning(f"Streaming DOCX extraction failed, using python-docx: {e}")
+        return (paragraph.text for paragraph in Document(file_path).paragraphs)
+    
+    def _iter_pptx_slide_texts(self, file_path: str) -> Iterator[List[str]]:
+        """Yield the text of each text shape per slide, streaming the XML when possible"""
+        if self.fast_ooxml:
+            try:
+                return iter(list(self._stream_pptx_slides(file_path)))
+            except (KeyError, ValueError, ET.ParseError, zipfile.BadZipFile) as e:
+                self.logger.warning(f"Streaming PPTX extraction failed, using python-pptx: {e}")
+        return ([shape.text for shape in slide.shapes if hasattr(shape, 'text')]
+                for slide in Presentation(file_path).slides)
+    
+    def _stream_docx_paragraphs(self, file_path: str) -> Iterator[str]:
+        """Read body paragraphs straight from word/document.xml.
+        
+        Mirrors python-docx's Document.paragraphs: only paragraphs directly in
+        the body, with text from their runs and hyperlink runs.
+        """
+        body, paragraph = W_NS + 'body', W_NS + 'p'
+        run_parents = ((W_NS + 'r',), (W_NS + 'hyperlink', W_NS + 'r'))
+        with zipfile.ZipFile(file_path) as archive, archive.open('word/document.xml') as part:
+            stack = []
+            parts = []
+            for event, elem in ET.iterparse(part, events=('start', 'end')):
+                if event == 'start':
+                    if not stack and elem.tag != W_NS + 'document':
+                        raise ValueError(f"Unexpected DOCX root element {elem.tag}")
+                    stack.append(elem.tag)
+                    continue
+                
+                # Run content directly under p/r or p/hyperlink/r
+                if len(stack) > 3 and stack[1] == body and stack[2] == paragraph \
+                        and tuple(stack[3:-1]) in run_parents:
+                    if elem.tag == W_NS + 't':
+                        parts.append(elem.text or '')
+                    elif elem.tag == W_NS + 'br':
+                        if elem.get(W_NS + 'type', 'textWrapping') == 'textWrapping':
+                            parts.append('\n')
+                    elif elem.tag in _DOCX_RUN_TEXT:
+                        parts.append(_DOCX_RUN_TEXT[elem.tag])
+                
+                stack.pop()
+                if len(stack) == 2 and stack[1] == body:
+                    # Top-level body element finished; release its subtree
+                    if elem.tag == paragraph:
+                        yield ''.join(parts)
+                    parts = []
+                    elem.clear()
+    
+    def _stream_pptx_slides(self, file_path: str) -> Iterator[List[str]]:
+        """Read slide shape text straight from the slide XML parts.
+        
+        Mirrors python-pptx: slides in presentation order, and for each slide
+        the text frames of the top-level p:sp shapes.
+        """
+        with zipfile.ZipFile(file_path) as archive:
+            for slide_part in self._pptx_slide_parts(archive):
+                with archive.open(slide_part) as part:
+                    yield self._stream_pptx_shape_texts(part)
+    
+    def _pptx_slide_parts(self, archive: zipfile.ZipFile) -> List[str]:
+        """Resolve slide part names in presentation order"""
+        with archive.open('ppt/_rels/presentation.xml.rels') as rels_part:
+            targets = {
+                rel.get('Id'): rel.get('Target')
+                for rel in ET.parse(rels_part).getroot().iter(PKG_REL_NS + 'Relationship')
+            }
+        with archive.open('ppt/presentation.xml') as presentation_part:
+            root = ET.parse(presentation_part).getroot()
+        if root.tag != P_NS + 'presentation':
+            raise ValueError(f"Unexpected PPTX root element {root.tag}")
+        
+        slide_parts = []
+        for slide_id in root.iter(P_NS + 'sldId'):
+            target = targets[slide_id.get(R_NS + 'id')]
+            if target.startswith('/'):
+                slide_parts.append(target.lstrip('/'))
+            else:
+                slide_parts.append(posixpath.normpath(posixpath.join('ppt', target)))
+        return slide_parts
+    
+    def _stream_pptx_shape_texts(self, part) -> List[str]:
+        sp_tree_path = [P_NS + 'sld', P_NS + 'cSld', P_NS + 'spTree', P_NS + 'sp', P_NS + 'txBody', A_NS + 'p']
+        shape_texts = []
+        stack = []
+        paragraphs = []
+        parts = []
+        for event, elem in ET.iterparse(part, events=('start', 'end')):
+            if event == 'start':
+                if not stack and elem.tag != P_NS + 'sld':
+                    raise ValueError(f"Unexpected PPTX slide root element {elem.tag}")
+                stack.append(elem.tag)
+                continue
+            
+            if stack[:6] == sp_tree_path:
+                depth = len(stack)
+                # a:p/a:r/a:t and a:p/a:fld/a:t carry text, a:p/a:br is a soft line break
+                if depth == 8 and elem.tag == A_NS + 't' and stack[6] in (A_NS + 'r', A_NS + 'fld'):
+                    parts.append(elem.text or '')
+                elif depth == 7 and elem.tag == A_NS + 'br':
+                    parts.append('\v')
+                elif depth == 6:
+                    paragraphs.append(''.join(parts))
+                    parts = []
+            
+            stack.pop()
+            if len(stack) == 3 and stack[2] == P_NS + 'spTree':
+                if elem.tag == P_NS + 'sp':
+                    shape_texts.append('\n'.join(paragraphs))
+                paragraphs = []
+                elem.clear()
+        
+        return shape_texts
+    
     def _parse_csv(self, file_path: str) -> Dict[str, Any]:
         """Parse CSV file"""
         df = pd.read_csv(file_path)
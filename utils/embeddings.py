@@ -1,36 +1,81 @@
 import openai
 import numpy as np
-from typing import List
+from typing import List, Optional
 import logging
 import os
-import streamlit as st  # <--- Important for Streamlit Cloud
+import time
+from .rate_limiter import AdaptiveRateLimiter, Priority, openai_limiter
+
+def get_openai_api_key() -> Optional[str]:
+    """Read the OpenAI key from Streamlit secrets, falling back to the environment.
+    
+    Streamlit is imported lazily so the headless service runs without it.
+    Outside a Streamlit app there may also be no secrets file, in which case
+    st.secrets raises instead of returning None.
+    """
+    try:
+        import streamlit as st  # Streamlit Cloud keeps the key in secrets
+        api_key = st.secrets.get("OPENAI_API_KEY")
+    except Exception:
+        api_key = None
+    return api_key or os.getenv("OPENAI_API_KEY")
 
 class EmbeddingGenerator:
-    def __init__(self, model_name: str = "text-embedding-3-large", api_key: str = None):
+    def __init__(self, model_name: str = "text-embedding-3-large", api_key: str = None,
+                 dimensions: Optional[int] = None, rate_limiter: Optional[AdaptiveRateLimiter] = None):
         self.model_name = model_name
-        self.api_key = (
-            api_key
-            or st.secrets.get("OPENAI_API_KEY")
-            or os.getenv("OPENAI_API_KEY")
-        )
+        # text-embedding-3 models can return shortened vectors natively
+        self.dimensions = dimensions
+        self.api_key = api_key or get_openai_api_key()
 
         self.logger = logging.getLogger(__name__)
         if not self.api_key:
             raise ValueError("OpenAI API key must be provided or set as environment variable 'OPENAI_API_KEY'")
 
-        openai.api_key = self.api_key
+        # Retries are left to the shared limiter (see AdaptiveRateLimiter.run)
+        self.client = openai.OpenAI(api_key=self.api_key, max_retries=0)
+        self.async_client = openai.AsyncOpenAI(api_key=self.api_key, max_retries=0)
+        self.rate_limiter = rate_limiter or openai_limiter
 
-    def generate_embeddings(self, texts: List[str]) -> np.ndarray:
+    def generate_embeddings(self, texts: List[str], timeout: Optional[float] = None) -> np.ndarray:
         try:
-            response = openai.embeddings.create(
+            response = self.client.embeddings.create(
                 model=self.model_name,
-                input=texts
+                input=texts,
+                **self._request_kwargs(timeout)
             )
-            embeddings = [d.embedding for d in response.data]
-            return np.array(embeddings)
+            return np.array([d.embedding for d in response.data])
         except Exception as e:
             self.logger.error(f"Error generating embeddings: {e}")
             raise
 
+    async def agenerate_embeddings(self, texts: List[str], priority: Priority = Priority.BULK,
+                                   timeout: Optional[float] = None) -> np.ndarray:
+        """Generate embeddings with the async client under the shared rate limiter"""
+        deadline = time.time() + timeout if timeout is not None else None
+        # Rough token estimate (~4 characters per token) for the token bucket
+        tokens = sum(len(text) for text in texts) / 4 + len(texts)
+
+        def call():
+            remaining = max(deadline - time.time(), 0.001) if deadline is not None else None
+            return self.async_client.embeddings.create(
+                model=self.model_name,
+                input=texts,
+                **self._request_kwargs(remaining)
+            )
+
+        try:
+            response = await self.rate_limiter.run(call, priority=priority, tokens=tokens)
+        except Exception as e:
+            self.logger.error(f"Error generating embeddings: {e}")
+            raise
+        return np.array([d.embedding for d in response.data])
+
+    def _request_kwargs(self, timeout: Optional[float]) -> dict:
+        kwargs = {'timeout': timeout} if timeout is not None else {}
+        if self.dimensions is not None:
+            kwargs['dimensions'] = self.dimensions
+        return kwargs
+
     def get_embedding_dimension(self) -> int:
-        return 3072
+        return self.dimensions or 3072
@@ -1,5 +1,11 @@
 from .document_parsers import DocumentParser
-from .vector_store import VectorStore
+from .vector_store import VectorStore, OffHeapVectors
+from .chunk_store import ChunkStore, ChunkView
 from .embeddings import EmbeddingGenerator
+from .micro_batcher import MicroBatcher
+from .session_store import Session, SessionStore
+from .job_queue import IngestionJob, IngestionJobQueue, JobStatus
+from .rate_limiter import AdaptiveRateLimiter, Priority
+from .chunk_dedupe import ChunkDeduplicator, strip_boilerplate
 
-__all__ = ['DocumentParser', 'VectorStore', 'EmbeddingGenerator']
\ No newline at end of file
+__all__ = ['DocumentParser', 'VectorStore', 'OffHeapVectors', 'ChunkStore', 'ChunkView', 'EmbeddingGenerator', 'MicroBatcher', 'Session', 'SessionStore', 'IngestionJob', 'IngestionJobQueue', 'JobStatus', 'AdaptiveRateLimiter', 'Priority', 'ChunkDeduplicator', 'strip_boilerplate']
\ No newline at end of file
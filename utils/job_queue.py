@@ -0,0 +1,195 @@
+import asyncio
+import os
+import time
+import uuid
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+import logging
+
+class JobStatus(Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+@dataclass
+class IngestionJob:
+    file_path: str
+    file_type: str
+    # The queue owns the file (e.g. an upload's temp copy) and deletes it
+    # once the job completes or its record expires
+    delete_file: bool = False
+    job_id: str = field(default_factory=lambda: str(uuid.uuid4())[:8])
+    status: JobStatus = JobStatus.QUEUED
+    trace_id: Optional[str] = None
+    attempts: int = 0
+    pages_parsed: int = 0
+    chunks_total: int = 0
+    chunks_embedded: int = 0
+    chunks_deduplicated: int = 0
+    cache_hit: Optional[bool] = None
+    error: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+
+    def reset_progress(self):
+        """Clear progress counters before a (re)run"""
+        self.pages_parsed = 0
+        self.chunks_total = 0
+        self.chunks_embedded = 0
+        self.chunks_deduplicated = 0
+        self.cache_hit = None
+        self.error = None
+        self.finished_at = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.job_id,
+            "file_path": self.file_path,
+            "file_type": self.file_type,
+            "status": self.status.value,
+            "trace_id": self.trace_id,
+            "attempts": self.attempts,
+            "pages_parsed": self.pages_parsed,
+            "chunks_total": self.chunks_total,
+            "chunks_embedded": self.chunks_embedded,
+            "chunks_deduplicated": self.chunks_deduplicated,
+            "cache_hit": self.cache_hit,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at
+        }
+
+class IngestionJobQueue:
+    """Runs ingestion jobs in the background with a bounded number of workers.
+
+    Finished job records expire `job_ttl` seconds after they finish, and at
+    most `max_finished_jobs` are kept; failed jobs stay retryable until then.
+    """
+
+    def __init__(self, runner: Callable[[IngestionJob], Awaitable[None]], max_workers: int = 2,
+                 job_ttl: float = 3600.0, max_finished_jobs: int = 1000):
+        self.runner = runner
+        self.max_workers = max_workers
+        self.job_ttl = job_ttl
+        self.max_finished_jobs = max_finished_jobs
+        self.expired = 0
+        self.jobs: Dict[str, IngestionJob] = {}
+        self.logger = logging.getLogger(__name__)
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+
+    async def submit(self, file_path: str, file_type: str, delete_file: bool = False) -> IngestionJob:
+        """Queue a new ingestion job and return it immediately"""
+        self.prune()
+        job = IngestionJob(file_path=file_path, file_type=file_type, delete_file=delete_file)
+        self.jobs[job.job_id] = job
+        await self._enqueue(job)
+        return job
+
+    async def retry(self, job_id: str) -> IngestionJob:
+        """Re-queue a failed job"""
+        job = self.jobs.get(job_id)
+        if job is None:
+            raise KeyError(f"Unknown job: {job_id}")
+        if job.status != JobStatus.FAILED:
+            raise ValueError(f"Only failed jobs can be retried (job {job_id} is {job.status.value})")
+        job.status = JobStatus.QUEUED
+        job.reset_progress()
+        await self._enqueue(job)
+        return job
+
+    def get_job(self, job_id: str) -> Optional[IngestionJob]:
+        return self.jobs.get(job_id)
+
+    def list_jobs(self) -> List[Dict[str, Any]]:
+        self.prune()
+        return [job.to_dict() for job in self.jobs.values()]
+
+    def prune(self) -> int:
+        """Drop finished job records past their TTL or beyond the cap"""
+        finished = sorted(
+            (job for job in self.jobs.values() if job.status in (JobStatus.COMPLETED, JobStatus.FAILED)),
+            key=lambda job: job.finished_at
+        )
+        cutoff = time.time() - self.job_ttl
+        excess = len(finished) - self.max_finished_jobs
+        expired = [job for i, job in enumerate(finished) if i < excess or job.finished_at < cutoff]
+        for job in expired:
+            del self.jobs[job.job_id]
+            self._release_file(job)
+        self.expired += len(expired)
+        return len(expired)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get job counts by status"""
+        self.prune()
+        counts = {status.value: 0 for status in JobStatus}
+        for job in self.jobs.values():
+            counts[job.status.value] += 1
+        return {
+            'total_jobs': len(self.jobs),
+            'max_workers': self.max_workers,
+            'queue_depth': self._queue.qsize() if self._queue else 0,
+            'expired': self.expired,
+            **counts
+        }
+
+    async def shutdown(self):
+        """Stop the worker tasks; queued jobs stay queued"""
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    async def _enqueue(self, job: IngestionJob):
+        self._ensure_workers()
+        await self._queue.put(job)
+
+    def _ensure_workers(self):
+        """Start workers lazily on the running loop"""
+        if self._queue is None:
+            self._queue = asyncio.Queue()
+        self._workers = [w for w in self._workers if not w.done()]
+        while len(self._workers) < self.max_workers:
+            self._workers.append(asyncio.create_task(self._worker()))
+
+    async def _worker(self):
+        while True:
+            job = await self._queue.get()
+            try:
+                await self._run(job)
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job: IngestionJob):
+        job.status = JobStatus.RUNNING
+        job.attempts += 1
+        job.started_at = time.time()
+        try:
+            await self.runner(job)
+            job.status = JobStatus.COMPLETED
+            self._release_file(job)
+        except asyncio.CancelledError:
+            job.status = JobStatus.FAILED
+            job.error = 'cancelled'
+            raise
+        except Exception as e:
+            self.logger.error(f"Ingestion job {job.job_id} failed: {e}")
+            job.status = JobStatus.FAILED
+            job.error = str(e)
+        finally:
+            job.finished_at = time.time()
+
+    def _release_file(self, job: IngestionJob):
+        if not job.delete_file:
+            return
+        try:
+            os.remove(job.file_path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            self.logger.warning(f"Could not delete {job.file_path} for job {job.job_id}: {e}")
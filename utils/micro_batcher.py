@@ -0,0 +1,84 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Tuple
+import logging
+
+class MicroBatcher:
+    """Coalesces concurrent requests into batches.
+
+    When no batch is running, pending requests are flushed on the next loop
+    iteration, so an idle system adds no latency. While a batch is running,
+    new requests are held for up to `window_ms` or until `max_batch_size`
+    requests are pending. Requests with the same key share one in-flight
+    result.
+    """
+
+    def __init__(self, process_batch: Callable[[List[Any]], Awaitable[List[Any]]],
+                 window_ms: float = 5.0, max_batch_size: int = 32):
+        self.process_batch = process_batch
+        self.window = window_ms / 1000.0
+        self.max_batch_size = max_batch_size
+        self.logger = logging.getLogger(__name__)
+        self._pending: List[Tuple[Hashable, Any, asyncio.Future]] = []
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self._timer: Optional[asyncio.Handle] = None
+        self._running = set()
+        self.stats = {'requests': 0, 'deduplicated': 0, 'batches': 0, 'batched_items': 0}
+
+    async def submit(self, key: Hashable, item: Any) -> Any:
+        """Queue an item and wait for its result"""
+        self.stats['requests'] += 1
+        future = self._inflight.get(key)
+        if future is not None:
+            self.stats['deduplicated'] += 1
+            return await asyncio.shield(future)
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._inflight[key] = future
+        self._pending.append((key, item, future))
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            delay = self.window if self._running else 0
+            self._timer = loop.call_later(delay, self._flush)
+
+        return await asyncio.shield(future)
+
+    def get_stats(self) -> Dict[str, Any]:
+        batches = self.stats['batches']
+        return {
+            **self.stats,
+            'avg_batch_size': self.stats['batched_items'] / batches if batches else 0.0,
+            'window_ms': self.window * 1000.0,
+            'max_batch_size': self.max_batch_size
+        }
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, []
+        task = asyncio.ensure_future(self._run(batch))
+        self._running.add(task)
+        task.add_done_callback(self._running.discard)
+
+    async def _run(self, batch: List[Tuple[Hashable, Any, asyncio.Future]]):
+        self.stats['batches'] += 1
+        self.stats['batched_items'] += len(batch)
+        try:
+            results = await self.process_batch([item for _, item, _ in batch])
+            for (_, _, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+        except Exception as e:
+            self.logger.error(f"Batch of {len(batch)} failed: {e}")
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+        finally:
+            for key, _, future in batch:
+                if self._inflight.get(key) is future:
+                    del self._inflight[key]
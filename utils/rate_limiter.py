@@ -0,0 +1,213 @@
+import asyncio
+import heapq
+import itertools
+import time
+from contextlib import asynccontextmanager
+from enum import IntEnum
+from typing import Any, Awaitable, Callable, Dict, Optional
+import logging
+
+class Priority(IntEnum):
+    INTERACTIVE = 0
+    BULK = 1
+
+class _TokenBucket:
+    def __init__(self, per_minute: float, burst_seconds: float):
+        self.rate = per_minute / 60.0
+        self.capacity = max(self.rate * burst_seconds, 1.0)
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def refill(self, now: float):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until `amount` is available (0 if it already is)"""
+        return max(0.0, (min(amount, self.capacity) - self.level) / self.rate)
+
+    def take(self, amount: float):
+        self.level -= min(amount, self.capacity)
+
+class AdaptiveRateLimiter:
+    """Shared limiter for upstream model calls.
+
+    Admission needs a free concurrency slot plus room in both the request
+    and the token bucket. Waiters are served strictly by priority, and bulk
+    work may hold at most `bulk_share` of the concurrency limit, so
+    interactive calls always find a slot. The concurrency limit adapts
+    AIMD-style: it grows by 1/limit per success, and halves on a 429, which
+    also pauses admissions for the retry-after period.
+    """
+
+    def __init__(self, requests_per_minute: float = 3000, tokens_per_minute: float = 1_000_000,
+                 max_concurrency: int = 32, min_concurrency: int = 1, bulk_share: float = 0.75,
+                 burst_seconds: float = 10.0, base_backoff: float = 1.0):
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min_concurrency
+        self.concurrency_limit = float(max(min_concurrency, max_concurrency // 2))
+        self.bulk_share = bulk_share
+        self.base_backoff = base_backoff
+        self.logger = logging.getLogger(__name__)
+        self._requests = _TokenBucket(requests_per_minute, burst_seconds)
+        self._tokens = _TokenBucket(tokens_per_minute, burst_seconds)
+        self._waiters = []
+        self._sequence = itertools.count()
+        self._in_flight = {priority: 0 for priority in Priority}
+        self._blocked_until = 0.0
+        self._consecutive_throttles = 0
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._waits = {priority: {'count': 0, 'total': 0.0, 'max': 0.0} for priority in Priority}
+        self.throttled = 0
+
+    @asynccontextmanager
+    async def acquire(self, priority: Priority = Priority.INTERACTIVE, tokens: float = 1.0):
+        """Wait for an upstream slot; the slot is released on exit"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        enqueued = time.monotonic()
+        heapq.heappush(self._waiters, (priority, next(self._sequence), tokens, future))
+        self._dispatch()
+        try:
+            await future
+        except asyncio.CancelledError:
+            # Admitted just as the waiter was cancelled: give the slot back
+            if future.done() and not future.cancelled():
+                self._release(priority)
+            raise
+        self._record_wait(priority, time.monotonic() - enqueued)
+        try:
+            yield
+        finally:
+            self._release(priority)
+
+    async def run(self, make_call: Callable[[], Awaitable[Any]], priority: Priority = Priority.INTERACTIVE,
+                  tokens: float = 1.0, max_retries: int = 3) -> Any:
+        """Run an upstream call under the limiter, retrying it on rate-limit errors.
+
+        `make_call` is invoked afresh for each attempt, so it should work out
+        any timeout from the caller's deadline at that point: time spent
+        queued here counts against it. A 429 backs off every caller sharing
+        the limiter, so clients used with it should have their own retries
+        disabled (`max_retries=0`). Use async clients, so that cancelling the
+        awaiting task aborts the in-flight request too.
+        """
+        for attempt in range(max_retries + 1):
+            async with self.acquire(priority, tokens):
+                try:
+                    result = await make_call()
+                except Exception as e:
+                    if not self._is_rate_limit(e) or attempt == max_retries:
+                        raise
+                    self.record_throttle(self._retry_after(e))
+                    continue
+                self.record_success()
+                return result
+
+    def record_success(self):
+        self._consecutive_throttles = 0
+        self.concurrency_limit = min(float(self.max_concurrency),
+                                     self.concurrency_limit + 1.0 / self.concurrency_limit)
+        self._dispatch()
+
+    def record_throttle(self, retry_after: Optional[float] = None):
+        """Back off after a 429: halve the concurrency limit and pause admissions"""
+        self.throttled += 1
+        self._consecutive_throttles += 1
+        self.concurrency_limit = max(float(self.min_concurrency), self.concurrency_limit / 2.0)
+        delay = retry_after if retry_after is not None else \
+            self.base_backoff * 2 ** (self._consecutive_throttles - 1)
+        self._blocked_until = max(self._blocked_until, time.monotonic() + delay)
+        self.logger.warning(f"Upstream rate limited; concurrency limit now "
+                            f"{int(self.concurrency_limit)}, pausing {delay:.1f}s")
+
+    def get_stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        self._requests.refill(now)
+        self._tokens.refill(now)
+        queued = {priority.name.lower(): 0 for priority in Priority}
+        for priority, _, _, future in self._waiters:
+            if not future.done():
+                queued[Priority(priority).name.lower()] += 1
+        return {
+            'concurrency_limit': int(self.concurrency_limit),
+            'in_flight': {priority.name.lower(): count for priority, count in self._in_flight.items()},
+            'queued': queued,
+            'queue_wait_seconds': {
+                priority.name.lower(): {
+                    'count': stats['count'],
+                    'avg': stats['total'] / stats['count'] if stats['count'] else 0.0,
+                    'max': stats['max']
+                } for priority, stats in self._waits.items()
+            },
+            'throttled': self.throttled,
+            'paused_for_seconds': max(0.0, self._blocked_until - now),
+            'request_bucket': self._requests.level,
+            'token_bucket': self._tokens.level
+        }
+
+    def _release(self, priority: Priority):
+        self._in_flight[priority] -= 1
+        self._dispatch()
+
+    def _record_wait(self, priority: Priority, waited: float):
+        stats = self._waits[priority]
+        stats['count'] += 1
+        stats['total'] += waited
+        stats['max'] = max(stats['max'], waited)
+
+    def _dispatch(self):
+        """Admit waiters in priority order while capacity allows"""
+        now = time.monotonic()
+        self._requests.refill(now)
+        self._tokens.refill(now)
+        while self._waiters:
+            priority, _, tokens, future = self._waiters[0]
+            if future.done():
+                heapq.heappop(self._waiters)
+                continue
+
+            limit = max(int(self.concurrency_limit), 1)
+            if priority == Priority.BULK:
+                limit = max(int(limit * self.bulk_share), 1)
+            if sum(self._in_flight.values()) >= max(int(self.concurrency_limit), 1) \
+                    or self._in_flight[priority] >= limit:
+                return  # woken again by the next release
+
+            delay = max(self._blocked_until - now,
+                        self._requests.wait_time(1.0),
+                        self._tokens.wait_time(tokens))
+            if delay > 0:
+                self._schedule(delay)
+                return
+
+            heapq.heappop(self._waiters)
+            self._requests.take(1.0)
+            self._tokens.take(tokens)
+            self._in_flight[priority] += 1
+            future.set_result(None)
+
+    def _schedule(self, delay: float):
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = asyncio.get_running_loop().call_later(delay, self._on_timer)
+
+    def _on_timer(self):
+        self._timer = None
+        self._dispatch()
+
+    @staticmethod
+    def _is_rate_limit(error: Exception) -> bool:
+        return getattr(error, 'status_code', None) == 429
+
+    @staticmethod
+    def _retry_after(error: Exception) -> Optional[float]:
+        response = getattr(error, 'response', None)
+        headers = getattr(response, 'headers', None) or {}
+        try:
+            return float(headers.get('retry-after'))
+        except (TypeError, ValueError):
+            return None
+
+# Global limiter shared by every OpenAI caller in the process
+openai_limiter = AdaptiveRateLimiter()
@@ -0,0 +1,77 @@
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+@dataclass
+class Session:
+    session_id: str
+    turns: List[Dict[str, Any]] = field(default_factory=list)
+    # Candidate set from the last full index search: chunk positions, the
+    # query embedding that produced them, the distance of the furthest
+    # candidate and the index size at the time
+    retrieval_anchor: Optional[Dict[str, Any]] = None
+    last_access: float = field(default_factory=time.time)
+
+    def add_turn(self, query: str, trace_id: str, max_turns: int):
+        self.turns.append({'query': query, 'trace_id': trace_id})
+        del self.turns[:-max_turns]
+
+class SessionStore:
+    """Conversation sessions with TTL expiry and LRU eviction"""
+
+    def __init__(self, ttl_seconds: float = 1800.0, max_sessions: int = 1000, max_turns: int = 50):
+        self.ttl_seconds = ttl_seconds
+        self.max_sessions = max_sessions
+        self.max_turns = max_turns
+        self._sessions: 'OrderedDict[str, Session]' = OrderedDict()
+        self.expired = 0
+        self.evicted = 0
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def get(self, session_id: str) -> Optional[Session]:
+        """Get a live session and mark it as recently used"""
+        self.prune()
+        session = self._sessions.get(session_id)
+        if session is not None:
+            session.last_access = time.time()
+            self._sessions.move_to_end(session_id)
+        return session
+
+    def get_or_create(self, session_id: str) -> Session:
+        session = self.get(session_id)
+        if session is None:
+            session = Session(session_id)
+            self._sessions[session_id] = session
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+                self.evicted += 1
+        return session
+
+    def remove(self, session_id: str) -> bool:
+        return self._sessions.pop(session_id, None) is not None
+
+    def prune(self) -> int:
+        """Drop sessions idle for longer than the TTL"""
+        cutoff = time.time() - self.ttl_seconds
+        expired = 0
+        # Sessions are kept in access order, so expired ones are at the front
+        while self._sessions:
+            session = next(iter(self._sessions.values()))
+            if session.last_access >= cutoff:
+                break
+            self._sessions.popitem(last=False)
+            expired += 1
+        self.expired += expired
+        return expired
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'active_sessions': len(self._sessions),
+            'max_sessions': self.max_sessions,
+            'ttl_seconds': self.ttl_seconds,
+            'expired': self.expired,
+            'evicted': self.evicted
+        }
@@ -1,38 +1,161 @@
 import faiss
 import numpy as np
-from typing import List, Dict, Any, Tuple
+from typing import List, Dict, Any, Optional, Tuple
 import pickle
 import os
+import shutil
+import tempfile
+import weakref
+from .chunk_store import ChunkStore, ChunkView
+
+def _remove_file(path: str):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+class OffHeapVectors:
+    """Append-only float32 matrix kept in a memory-mapped file"""
+    
+    def __init__(self, dimension: int, path: str = None, temporary: bool = None):
+        # Files the store creates itself are deleted with it
+        if temporary is None:
+            temporary = path is None
+        self.path = path or self.temp_path()
+        if temporary:
+            weakref.finalize(self, _remove_file, self.path)
+        self.dimension = dimension
+        self.count = os.path.getsize(self.path) // (4 * dimension)
+        self._map = None
+    
+    def append(self, vectors: np.ndarray):
+        with open(self.path, 'ab') as f:
+            f.write(np.ascontiguousarray(vectors, dtype='float32').tobytes())
+        self.count += len(vectors)
+        self._map = None
+    
+    def get(self, positions: np.ndarray) -> np.ndarray:
+        """Read the rows at the given positions (only those pages are touched)"""
+        if self._map is None:
+            self._map = np.memmap(self.path, dtype='float32', mode='r', shape=(self.count, self.dimension))
+        return self._map[positions]
+    
+    @property
+    def nbytes(self) -> int:
+        return self.count * self.dimension * 4
+    
+    @staticmethod
+    def temp_path() -> str:
+        fd, path = tempfile.mkstemp(prefix='dot_vectors_', suffix='.f32')
+        os.close(fd)
+        return path
 
 class VectorStore:
-    def __init__(self, dimension: int = 384):
+    """FAISS-backed chunk store.
+    
+    With `search_dimension` set, the FAISS index holds only renormalised
+    prefixes of the embeddings (as with Matryoshka-trained models such as
+    text-embedding-3). The full vectors live in a memory-mapped file and are
+    used to re-rank the `k * rerank_factor` short-list from the compact index.
+    """
+    
+    def __init__(self, dimension: int = 384, search_dimension: Optional[int] = None,
+                 rerank_factor: int = 4):
         self.dimension = dimension
-        self.index = faiss.IndexFlatL2(dimension)
-        self.documents = []
-        self.metadata = []
+        self.search_dimension = search_dimension if search_dimension and search_dimension < dimension else None
+        self.rerank_factor = rerank_factor
+        self.index = faiss.IndexFlatL2(self.search_dimension or dimension)
+        self.full_vectors = OffHeapVectors(dimension) if self.search_dimension else None
+        self.chunks = ChunkStore()
+    
+    def add_documents(self, embeddings: np.ndarray, document_id: str, texts: List[str],
+                     sections: List[Any], document_metadata: Dict[str, Any] = None,
+                     document_type: str = None, chunk_ids: List[int] = None) -> int:
+        """Add the chunks of one document with their embeddings; returns the first chunk's position"""
+        embeddings = embeddings.astype('float32')
+        if self.full_vectors is not None:
+            self.full_vectors.append(embeddings)
+        self.index.add(self._index_vectors(embeddings))
+        return self.chunks.add_document(document_id, texts, sections, document_metadata, document_type, chunk_ids)
     
-    def add_documents(self, embeddings: np.ndarray, documents: List[str], 
-                     metadata: List[Dict[str, Any]]):
-        """Add documents with their embeddings to the vector store"""
-        self.index.add(embeddings.astype('float32'))
-        self.documents.extend(documents)
-        self.metadata.extend(metadata)
+    def add_duplicates(self, document_id: str, positions: List[int], chunk_ids: List[int],
+                       sections: List[Any], document_metadata: Dict[str, Any] = None,
+                       document_type: str = None):
+        """Point repeated chunks of a document at already indexed chunks instead of re-adding them"""
+        self.chunks.add_duplicates(document_id, positions, chunk_ids, sections, document_metadata, document_type)
+    
+    def get_chunk(self, position: int) -> ChunkView:
+        """Get a view of the chunk stored at an index position"""
+        return self.chunks[position]
     
     def search(self, query_embedding: np.ndarray, k: int = 5) -> List[Dict[str, Any]]:
         """Search for similar documents"""
-        query_embedding = query_embedding.astype('float32').reshape(1, -1)
-        distances, indices = self.index.search(query_embedding, k)
+        return self.search_batch(query_embedding.reshape(1, -1), k)[0]
+    
+    def search_batch(self, query_embeddings: np.ndarray, k: int = 5) -> List[List[Dict[str, Any]]]:
+        """Search for several queries with a single index call"""
+        query_embeddings = query_embeddings.astype('float32').reshape(len(query_embeddings), -1)
+        if self.full_vectors is not None:
+            return self._two_stage_search(query_embeddings, k)
+        distances, indices = self.index.search(query_embeddings, k)
+        
+        batch_results = []
+        for row_distances, row_indices in zip(distances, indices):
+            results = []
+            for distance, idx in zip(row_distances, row_indices):
+                if 0 <= idx < len(self.chunks):
+                    results.append({
+                        'chunk': self.chunks[idx],
+                        'score': float(distance)
+                    })
+            batch_results.append(results)
+        
+        return batch_results
+    
+    def rescore(self, query_embedding: np.ndarray, positions: List[int], k: int = 5) -> List[Dict[str, Any]]:
+        """Rank only the given chunk positions against a query, nearest first"""
+        positions = np.asarray(positions, dtype='int64')
+        if self.full_vectors is not None:
+            vectors = self.full_vectors.get(positions)
+        else:
+            vectors = self.index.reconstruct_batch(positions)
+        distances = ((vectors - query_embedding.astype('float32').reshape(1, -1)) ** 2).sum(axis=1)
+        order = np.argsort(distances)[:k]
+        return [{
+            'chunk': self.chunks[int(positions[i])],
+            'score': float(distances[i])
+        } for i in order]
+    
+    def _index_vectors(self, embeddings: np.ndarray) -> np.ndarray:
+        """Vectors as stored in the FAISS index: full, or truncated and renormalised"""
+        if self.search_dimension is None:
+            return embeddings
+        prefix = np.ascontiguousarray(embeddings[:, :self.search_dimension])
+        norms = np.linalg.norm(prefix, axis=1, keepdims=True)
+        return prefix / np.maximum(norms, 1e-12)
+    
+    def _two_stage_search(self, query_embeddings: np.ndarray, k: int) -> List[List[Dict[str, Any]]]:
+        """Short-list on the compact index, then re-rank with the full vectors"""
+        shortlist_size = min(k * self.rerank_factor, self.index.ntotal)
+        if shortlist_size == 0:
+            return [[] for _ in query_embeddings]
+        _, shortlists = self.index.search(self._index_vectors(query_embeddings), shortlist_size)
+        
+        # Gather the short-listed full vectors for the whole batch in one read
+        vectors = self.full_vectors.get(np.maximum(shortlists, 0).reshape(-1))
+        vectors = vectors.reshape(len(query_embeddings), shortlist_size, self.dimension)
+        distances = ((vectors - query_embeddings[:, None, :]) ** 2).sum(axis=2)
+        distances[shortlists < 0] = np.inf
         
-        results = []
-        for i, idx in enumerate(indices[0]):
-            if idx < len(self.documents):
-                results.append({
-                    'document': self.documents[idx],
-                    'metadata': self.metadata[idx],
-                    'score': float(distances[0][i])
-                })
+        batch_results = []
+        for shortlist, row_distances in zip(shortlists, distances):
+            order = np.argsort(row_distances)[:k]
+            batch_results.append([{
+                'chunk': self.chunks[int(shortlist[i])],
+                'score': float(row_distances[i])
+            } for i in order if shortlist[i] >= 0])
         
-        return results
+        return batch_results
     
     def save(self, path: str):
         """Save vector store to disk"""
@@ -41,12 +164,17 @@ class VectorStore:
         # Save FAISS index
         faiss.write_index(self.index, f"{path}.index")
         
-        # Save documents and metadata
+        # Save full-width vectors used for re-ranking
+        if self.full_vectors is not None:
+            shutil.copyfile(self.full_vectors.path, f"{path}.vectors")
+        
+        # Save chunk texts and metadata
         with open(f"{path}.pkl", 'wb') as f:
             pickle.dump({
-                'documents': self.documents,
-                'metadata': self.metadata,
-                'dimension': self.dimension
+                'chunks': self.chunks,
+                'dimension': self.dimension,
+                'search_dimension': self.search_dimension,
+                'rerank_factor': self.rerank_factor
             }, f)
     
     def load(self, path: str):
@@ -54,17 +182,28 @@ class VectorStore:
         # Load FAISS index
         self.index = faiss.read_index(f"{path}.index")
         
-        # Load documents and metadata
+        # Load chunk texts and metadata
         with open(f"{path}.pkl", 'rb') as f:
             data = pickle.load(f)
-            self.documents = data['documents']
-            self.metadata = data['metadata']
+            self.chunks = data['chunks']
             self.dimension = data['dimension']
+            self.search_dimension = data.get('search_dimension')
+            self.rerank_factor = data.get('rerank_factor', self.rerank_factor)
+        
+        # Work on a copy of the saved vectors so later additions leave the snapshot intact
+        self.full_vectors = None
+        if self.search_dimension:
+            vector_path = OffHeapVectors.temp_path()
+            shutil.copyfile(f"{path}.vectors", vector_path)
+            self.full_vectors = OffHeapVectors(self.dimension, vector_path, temporary=True)
     
     def get_stats(self) -> Dict[str, Any]:
         """Get statistics about the vector store"""
         return {
-            'total_documents': len(self.documents),
+            **self.chunks.get_stats(),
             'dimension': self.dimension,
-            'index_size': self.index.ntotal
+            'search_dimension': self.search_dimension or self.dimension,
+            'index_size': self.index.ntotal,
+            'index_bytes': self.index.ntotal * self.index.d * 4,
+            'full_vector_bytes': self.full_vectors.nbytes if self.full_vectors is not None else 0
         }
\ No newline at end of file